@@ -0,0 +1,80 @@
+"""Times EraDataAPI.update_data with the pandas and polars engines on synthetic data sources.
+
+The sources mimic the real ones (daily, weekly and trading-day observations over the full era range) with the
+current column count scaled by 1x, 10x and 100x.
+
+    python benchmarks/engine_benchmark.py [--scales 1 10 100] [--repeat 3]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from mock import patch
+
+import numerai_era_data.date_utils as date_utils
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+from numerai_era_data.era_data_api import EraDataAPI
+
+# columns per observation frequency in the current data sources: calendar, markets, wei, bls
+BASE_COLUMNS = {1: 3, 5: 16, 7: 1, 30: 27}
+
+
+def make_data_sources(scale: int) -> list:
+    rng = np.random.default_rng(0)
+    dates = pd.date_range(date_utils.get_date_for_era(1), date_utils.get_date_for_era(date_utils.get_current_era()))
+    data_sources = []
+    for freq, num_columns in BASE_COLUMNS.items():
+        rows = dates[::freq]
+        columns = [f"era_feature_bench_{freq}_{i}" for i in range(num_columns * scale)]
+        data = pd.DataFrame(rng.normal(size=(len(rows), len(columns))), columns=columns)
+        data.insert(0, BaseDataSource.DATE_COL, rows)
+
+        class SyntheticDataSource:
+            frame = data
+
+            def get_columns(self):
+                return self.frame.columns.drop(BaseDataSource.DATE_COL).tolist()
+
+            def get_data(self, start_date, end_date):
+                return self.frame
+
+        data_sources.append(SyntheticDataSource)
+    return data_sources
+
+
+def run(engine: str, data_sources: list, cache_file: str, repeat: int) -> float:
+    era_data_api = EraDataAPI(server_url="", engine=engine)
+    era_data_api.DATA_CACHE_FILE = cache_file
+    era_data_api._get_data_sources = lambda: data_sources
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        era_data_api.update_data()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory, patch.object(EraDataAPI, "CACHE_DIRECTORY", directory):
+        print(f"{'scale':>6} {'columns':>8} " + " ".join(f"{engine:>10}" for engine in EraDataAPI.ENGINES))
+        for scale in args.scales:
+            data_sources = make_data_sources(scale)
+            timings = [
+                run(engine, data_sources, os.path.join(directory, f"{engine}.parquet"), args.repeat)
+                for engine in EraDataAPI.ENGINES
+            ]
+            num_columns = sum(BASE_COLUMNS.values()) * scale
+            print(f"{scale:>6} {num_columns:>8} " + " ".join(f"{timing:>9.3f}s" for timing in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Compares parquet writer settings for the era data cache: file size, write time, full read time and the read time
+of an era range filter.
+
+The era data is built by EraDataAPI.update_data from the synthetic data sources of engine_benchmark.py, with the
+current column count scaled by 1x, 10x and 100x.
+
+    python benchmarks/parquet_benchmark.py [--scales 1 10 100] [--repeat 5]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from engine_benchmark import BASE_COLUMNS, make_data_sources
+
+import numerai_era_data.date_utils as date_utils
+import numerai_era_data.parquet_writer as parquet_writer
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+from numerai_era_data.era_data_api import EraDataAPI
+
+# the last year of eras, as read by incremental consumers
+RANGE_ERAS = 52
+
+CONFIGS = {
+    "default": None,
+    "config": parquet_writer.DEFAULT_CONFIG,
+    "no split": parquet_writer.DEFAULT_CONFIG._replace(byte_stream_split_threshold=None),
+    "zstd": parquet_writer.DEFAULT_CONFIG._replace(compression="zstd"),
+    "lz4": parquet_writer.DEFAULT_CONFIG._replace(compression="lz4"),
+    "256 eras": parquet_writer.DEFAULT_CONFIG._replace(row_group_size=256),
+}
+
+
+def make_table(scale: int, directory: str) -> pa.Table:
+    era_data_api = EraDataAPI(server_url="")
+    era_data_api.DATA_CACHE_FILE = os.path.join(directory, "build.parquet")
+    data_sources = make_data_sources(scale)
+    era_data_api._get_data_sources = lambda: data_sources
+    era_data_api.update_data()
+    return pa.Table.from_pandas(era_data_api.data_cache, preserve_index=False)
+
+
+def best_time(function, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(table: pa.Table, config: parquet_writer.ParquetWriterConfig, path: str, repeat: int) -> tuple:
+    if config is None:
+        # the settings of DataFrame.to_parquet before the writer config
+        write = lambda: pq.write_table(table, path)  # noqa: E731
+    else:
+        write = lambda: parquet_writer.write_table(table, path, config)  # noqa: E731
+    first_era = str(date_utils.get_current_era() - RANGE_ERAS + 1).zfill(4)
+    filters = [(BaseDataSource.ERA_COL, ">=", first_era)]
+
+    write_time = best_time(write, repeat)
+    read_time = best_time(lambda: pq.read_table(path).to_pandas(), repeat)
+    range_time = best_time(lambda: pq.read_table(path, filters=filters).to_pandas(), repeat)
+    return os.path.getsize(path), write_time, read_time, range_time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"{'scale':>6} {'columns':>8} {'settings':>10} {'size':>12} {'write':>10} {'read':>10} {'range':>10}")
+        for scale in args.scales:
+            table = make_table(scale, directory)
+            num_columns = sum(BASE_COLUMNS.values()) * scale
+            for name, config in CONFIGS.items():
+                size, write_time, read_time, range_time = run(
+                    table, config, os.path.join(directory, "bench.parquet"), args.repeat
+                )
+                print(
+                    f"{scale:>6} {num_columns:>8} {name:>10} {size:>12} "
+                    f"{write_time:>9.3f}s {read_time:>9.3f}s {range_time:>9.3f}s"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+
+# heavy dependencies (pandas, pyarrow, yfinance) are imported inside the subcommands that need them so that
+# lightweight invocations such as cron jobs and container health checks start quickly
+
+# matches EraDataAPI.CACHE_DIRECTORY, duplicated here so that resolving it does not import pandas
+CACHE_DIRECTORY = os.path.join(os.path.dirname(__file__), "cache")
+DATA_CACHE_FILE = os.path.join(CACHE_DIRECTORY, "data.parquet")
+DAILY_CACHE_FILE = os.path.join(CACHE_DIRECTORY, "daily.parquet")
+ERA_COL = "era"
+# matches EraDataAPI.MANIFEST_KEY
+MANIFEST_KEY = b"numerai_era_data.manifest"
+EXPORT_FORMATS = ["parquet", "arrow", "csv"]
+
+
+def refresh(args: argparse.Namespace):
+    from numerai_era_data.era_data_api import EraDataAPI
+
+    era_data_api = EraDataAPI(server_url="")
+    data_sources = _select_data_sources(era_data_api._get_data_sources(), args.sources) if args.sources else None
+
+    if args.incremental and data_sources is None:
+        # only fetch when the cached data is stale or missing columns
+        era_data_api.get_all_eras()
+        era_data_api.get_current_daily()
+    elif args.incremental:
+        # the given sources only fetch the most recent eras if their columns are cached at their current version
+        era_data_api.update_data(data_sources, incremental=True)
+        era_data_api.update_daily_data(data_sources)
+    else:
+        era_data_api.update_data(data_sources)
+        era_data_api.update_daily_data(data_sources)
+
+    print(f"era data: {len(era_data_api.data_cache)} eras, {len(era_data_api.data_cache.columns)} columns")
+
+
+def export(args: argparse.Namespace):
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+
+    import numerai_era_data.parquet_writer as parquet_writer
+
+    cache_file = DAILY_CACHE_FILE if args.daily else DATA_CACHE_FILE
+    if not os.path.exists(cache_file):
+        raise SystemExit(f"no cached data at {cache_file}, run refresh first")
+
+    columns = None
+    if args.columns:
+        columns = [ERA_COL] + [column for column in args.columns if column != ERA_COL]
+    filters = [(ERA_COL, "in", _parse_eras(args.eras))] if args.eras else None
+    table = pq.read_table(cache_file, columns=columns, filters=filters)
+
+    output = args.output if args.output is not None else sys.stdout.buffer
+    if args.format == "parquet":
+        parquet_writer.write_table(table, output)
+    elif args.format == "arrow":
+        sink = pa.OSFile(output, "wb") if isinstance(output, str) else pa.PythonFile(output, mode="w")
+        with sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        pa_csv.write_csv(table, output)
+
+
+def stats(args: argparse.Namespace):
+    import pyarrow.parquet as pq
+
+    for name, cache_file in [("era data", DATA_CACHE_FILE), ("daily data", DAILY_CACHE_FILE)]:
+        if not os.path.exists(cache_file):
+            print(f"{name}: missing ({cache_file})")
+            continue
+
+        parquet_file = pq.ParquetFile(cache_file)
+        metadata = parquet_file.metadata
+        modified = datetime.fromtimestamp(os.path.getmtime(cache_file)).isoformat(timespec="seconds")
+        print(f"{name}: {cache_file}")
+        print(f"  rows: {metadata.num_rows}")
+        print(f"  columns: {len(parquet_file.schema_arrow.names)}")
+        print(f"  size: {os.path.getsize(cache_file)} bytes")
+        print(f"  modified: {modified}")
+
+        if ERA_COL in parquet_file.schema_arrow.names and metadata.num_rows > 0:
+            eras = parquet_file.read(columns=[ERA_COL]).column(ERA_COL).to_pylist()
+            print(f"  eras: {min(eras)} to {max(eras)}")
+
+        metadata = parquet_file.schema_arrow.metadata or {}
+        if MANIFEST_KEY in metadata:
+            for source, entry in sorted(json.loads(metadata[MANIFEST_KEY]).items()):
+                print(f"  {source}: version {entry['version']}, {len(entry['columns'])} columns")
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(prog="numerai-era-data", description="Manage the Numerai era data cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="fetch data and update the cache")
+    refresh_parser.add_argument(
+        "--sources", nargs="+", help="data sources to refresh, by class name or module suffix (e.g. bls markets)"
+    )
+    refresh_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only update if the cache is stale or missing columns, with --sources only refetch their recent eras",
+    )
+    refresh_parser.set_defaults(func=refresh)
+
+    export_parser = subparsers.add_parser("export", help="export cached data")
+    export_parser.add_argument("--format", choices=EXPORT_FORMATS, default="parquet")
+    export_parser.add_argument("--columns", nargs="+", help="columns to export, the era column is always included")
+    export_parser.add_argument("--eras", nargs="+", help="eras or era ranges to export (e.g. 1 5 100-200)")
+    export_parser.add_argument("--daily", action="store_true", help="export the current daily data")
+    export_parser.add_argument("--output", "-o", help="output file, defaults to stdout")
+    export_parser.set_defaults(func=export)
+
+    stats_parser = subparsers.add_parser("stats", help="show cache statistics")
+    stats_parser.set_defaults(func=stats)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+def _parse_eras(eras: list) -> list:
+    parsed = []
+    for era in eras:
+        if "-" in era:
+            first, last = era.split("-")
+            parsed += [str(i).zfill(4) for i in range(int(first), int(last) + 1)]
+        else:
+            parsed.append(era.zfill(4) if era.isdigit() else era)
+    return parsed
+
+
+def _select_data_sources(data_sources: list, names: list) -> list:
+    selected = []
+    for name in names:
+        matches = [
+            data_source
+            for data_source in data_sources
+            if name.lower() in (data_source.__name__.lower(), data_source.__module__.split(".ds_")[-1].lower())
+        ]
+        if not matches:
+            available = ", ".join(data_source.__name__ for data_source in data_sources)
+            raise SystemExit(f"unknown data source {name}, available: {available}")
+        selected += matches
+    return selected
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
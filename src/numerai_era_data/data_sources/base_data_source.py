@@ -1,14 +1,27 @@
+import os
 from abc import ABC, abstractmethod
 from datetime import date
 
+import numpy as np
 import pandas as pd
 
+import numerai_era_data.window_features as window_features
+from numerai_era_data.transform_graph import TransformGraph
+
 
 class BaseDataSource(ABC):
     _BASE_PREFIX = "era_feature_"
     _BASE_PREFIX_RAW = "era_feature_raw_"
     DATE_COL = "date"
     ERA_COL = "era"
+    CACHE_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "cache")
+    TRANSFORM_CACHE_DIRECTORY = os.path.join(CACHE_DIRECTORY, "transforms")
+    # seconds to wait for an upstream service, so a hung request fails and counts toward the circuit breaker
+    REQUEST_TIMEOUT = 60
+    # bump when the values of existing columns change, so cached data from the previous version is refetched
+    VERSION = 1
+
+    _transform_graph = None
 
     @abstractmethod
     def get_data(self, start_date: date, end_date: date) -> pd.DataFrame:  # pragma: no cover
@@ -22,3 +35,103 @@ class BaseDataSource(ABC):
     @abstractmethod
     def get_columns(self) -> list:  # pragma: no cover
         pass
+
+    @staticmethod
+    def _get_transform_graph() -> TransformGraph:
+        """Returns the transform graph shared by all data sources"""
+        if BaseDataSource._transform_graph is None:
+            BaseDataSource._transform_graph = TransformGraph(BaseDataSource.TRANSFORM_CACHE_DIRECTORY)
+        return BaseDataSource._transform_graph
+
+    @staticmethod
+    def _get_date_grid(start_date: date, end_date: date) -> np.ndarray:
+        """Returns every day from start_date to end_date inclusive as datetime64[D]"""
+        return np.arange(np.datetime64(start_date, "D"), np.datetime64(end_date, "D") + np.timedelta64(1, "D"))
+
+    @staticmethod
+    def _as_of_fill(grid: np.ndarray, available_dates: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """For each grid date, returns the latest non-null value per column that is available on or before it.
+        available_dates has one entry per row of the 2d values block"""
+        order = np.argsort(available_dates, kind="stable")
+        available_dates = available_dates[order]
+        values = values[order]
+        result = np.full((len(grid), values.shape[1]), np.nan)
+
+        missing = np.isnan(values)
+        if not missing.any():
+            # every column is observed on the same dates, so one search serves the whole block
+            index = np.searchsorted(available_dates, grid, side="right") - 1
+            found = index >= 0
+            result[found] = values[index[found]]
+            return result
+
+        for i in range(values.shape[1]):
+            valid = ~missing[:, i]
+            index = np.searchsorted(available_dates[valid], grid, side="right") - 1
+            found = index >= 0
+            result[found, i] = values[valid, i][index[found]]
+
+        return result
+
+    @classmethod
+    def _get_window_feature_columns(cls, column: str, windows: list) -> list:
+        """Returns the window feature columns of a series column, ordered by feature then window. Scale-free
+        features of raw series are not raw themselves"""
+        columns = []
+        for feature in window_features.FEATURES:
+            prefix = column
+            if feature in window_features.SCALE_FREE_FEATURES and column.startswith(cls._BASE_PREFIX_RAW):
+                prefix = cls._BASE_PREFIX + column[len(cls._BASE_PREFIX_RAW):]
+            columns += [f"{prefix}_{feature}{window}" for window in windows]
+        return columns
+
+    @staticmethod
+    def _get_window_features(*observations: pd.DataFrame, windows: list) -> pd.DataFrame:
+        """Returns z-scores, percentile ranks, slopes and accelerations over each window (in periods) for every
+        column of native frequency observations indexed by period, computing all columns at once.
+        Multiple frames are outer joined on their index, so series sharing a frequency can be passed together"""
+        block = pd.concat(observations, axis=1) if len(observations) > 1 else observations[0]
+        values = block.to_numpy(dtype="float64", na_value=np.nan)
+
+        results = {}
+        for feature, func in window_features.FEATURES.items():
+            for window in windows:
+                results[(feature, window)] = func(values, window)
+
+        data = {}
+        for i, column in enumerate(block.columns):
+            columns = BaseDataSource._get_window_feature_columns(column, windows)
+            data.update(zip(columns, [result[:, i] for result in results.values()]))
+
+        return pd.DataFrame(data, index=block.index)
+
+    def _align_daily(
+        self, observations: pd.DataFrame, start_date: date, end_date: date, lags: dict = None
+    ) -> pd.DataFrame:
+        """Reindexes sparse observations onto a daily grid from start_date to end_date inclusive.
+        Each observation becomes available its column's lag in days after its date (default 0) and is carried
+        forward until a newer observation becomes available, matching a left merge onto the grid plus ffill"""
+        lags = lags or {}
+        grid = self._get_date_grid(start_date, end_date)
+        observation_dates = pd.to_datetime(observations[self.DATE_COL])
+        if observation_dates.dt.tz is not None:
+            observation_dates = observation_dates.dt.tz_localize(None)
+        observation_dates = observation_dates.to_numpy(dtype="datetime64[D]")
+        columns = [column for column in observations.columns if column != self.DATE_COL]
+
+        # columns sharing a lag are filled as one block
+        lag_groups = {}
+        for column in columns:
+            lag_groups.setdefault(lags.get(column, 0), []).append(column)
+
+        data = {self.DATE_COL: grid.astype("datetime64[ns]")}
+        for lag, group in lag_groups.items():
+            filled = self._as_of_fill(
+                grid,
+                observation_dates + np.timedelta64(lag, "D"),
+                observations[group].to_numpy(dtype="float64", na_value=np.nan),
+            )
+            for i, column in enumerate(group):
+                data[column] = filled[:, i]
+
+        return pd.DataFrame(data)[[self.DATE_COL] + columns]
@@ -1,237 +1,263 @@
-from datetime import date, timedelta
 import math
+import os
+from datetime import date, timedelta
+from typing import NamedTuple
 
 import pandas as pd
 import requests
 
+import numerai_era_data.window_features as window_features
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 
 
+class BLSSeries(NamedTuple):
+    series_id: str
+    # COLUMN_<key> attribute suffix and column name, raw series get the raw prefix
+    key: str
+    name: str
+    raw: bool
+    frequency: int
+    release_lag: int
+    # csv with period and release_date columns, a path relative to the release calendar directory or absolute
+    release_calendar: str = None
+
+
 class DataSourceBLS(BaseDataSource):
     _PREFIX = BaseDataSource._BASE_PREFIX + "bls_"
     _PREFIX_RAW = BaseDataSource._BASE_PREFIX_RAW + "bls_"
 
-    # columns
-    COLUMN_CPI_U = _PREFIX_RAW + "cpi_u"
-    COLUMN_CPI_U_ALL = _PREFIX_RAW + "cpi_u_all"
-    COLUMN_PPI_FINISHED = _PREFIX_RAW + "ppi_finished"
-    COLUMN_UE = _PREFIX + "unemployment"
-    COLUMN_WEEKLY_HOURS = _PREFIX + "weekly_hours"
-    COLUMN_HOURLY_EARNINGS = _PREFIX_RAW + "hourly_earnings"
-    COLUMN_OUTPUT = _PREFIX + "output"
-    COLUMN_IMPORT_INDEX = _PREFIX_RAW + "import_index"
-    COLUMN_EXPORT_INDEX = _PREFIX_RAW + "export_index"
-
-    # columns from month over month and year over year changes
-    COLUMN_CPI_U_MOM = _PREFIX + "cpi_u_mom"
-    COLUMN_CPI_U_YOY = _PREFIX + "cpi_u_yoy"
-    COLUMN_CPI_U_ALL_MOM = _PREFIX + "cpi_u_all_mom"
-    COLUMN_CPI_U_ALL_YOY = _PREFIX + "cpi_u_all_yoy"
-    COLUMN_PPI_FINISHED_MOM = _PREFIX + "ppi_finished_mom"
-    COLUMN_PPI_FINISHED_YOY = _PREFIX + "ppi_finished_yoy"
-    COLUMN_UE_MOM = _PREFIX + "unemployment_mom"
-    COLUMN_UE_YOY = _PREFIX + "unemployment_yoy"
-    COLUMN_WEEKLY_HOURS_MOM = _PREFIX + "weekly_hours_mom"
-    COLUMN_WEEKLY_HOURS_YOY = _PREFIX + "weekly_hours_yoy"
-    COLUMN_HOURLY_EARNINGS_MOM = _PREFIX + "hourly_earnings_mom"
-    COLUMN_HOURLY_EARNINGS_YOY = _PREFIX + "hourly_earnings_yoy"
-    COLUMN_OUTPUT_MOM = _PREFIX + "output_mom"
-    COLUMN_OUTPUT_YOY = _PREFIX + "output_yoy"
-    COLUMN_IMPORT_INDEX_MOM = _PREFIX + "import_index_mom"
-    COLUMN_IMPORT_INDEX_YOY = _PREFIX + "import_index_yoy"
-    COLUMN_EXPORT_INDEX_MOM = _PREFIX + "export_index_mom"
-    COLUMN_EXPORT_INDEX_YOY = _PREFIX + "export_index_yoy"
-
-    COLUMNS = [
-        COLUMN_CPI_U,
-        COLUMN_CPI_U_ALL,
-        COLUMN_PPI_FINISHED,
-        COLUMN_UE,
-        COLUMN_WEEKLY_HOURS,
-        COLUMN_HOURLY_EARNINGS,
-        COLUMN_OUTPUT,
-        COLUMN_IMPORT_INDEX,
-        COLUMN_EXPORT_INDEX,
-        COLUMN_CPI_U_MOM,
-        COLUMN_CPI_U_YOY,
-        COLUMN_CPI_U_ALL_MOM,
-        COLUMN_CPI_U_ALL_YOY,
-        COLUMN_PPI_FINISHED_MOM,
-        COLUMN_PPI_FINISHED_YOY,
-        COLUMN_UE_MOM,
-        COLUMN_UE_YOY,
-        COLUMN_WEEKLY_HOURS_MOM,
-        COLUMN_WEEKLY_HOURS_YOY,
-        COLUMN_HOURLY_EARNINGS_MOM,
-        COLUMN_HOURLY_EARNINGS_YOY,
-        COLUMN_OUTPUT_MOM,
-        COLUMN_OUTPUT_YOY,
-        COLUMN_IMPORT_INDEX_MOM,
-        COLUMN_IMPORT_INDEX_YOY,
-        COLUMN_EXPORT_INDEX_MOM,
-        COLUMN_EXPORT_INDEX_YOY,
+    # observation frequencies, as periods per year
+    MONTHLY = 12
+    QUARTERLY = 4
+
+    # series catalog, each series adds a value column plus period-over-period and year-over-year change columns
+    # release rules: an observation becomes available the day after its release in the series' release calendar,
+    # or release_lag days after the start of its period if it has no calendar or the calendar does not list it
+    SERIES = [
+        BLSSeries("CUUR0000SA0L1E", "CPI_U", "cpi_u", True, MONTHLY, 48),
+        BLSSeries("CUUR0000SA0", "CPI_U_ALL", "cpi_u_all", True, MONTHLY, 48),
+        BLSSeries("WPUFD49207", "PPI_FINISHED", "ppi_finished", True, MONTHLY, 45),
+        BLSSeries("LNS14000000", "UE", "unemployment", False, MONTHLY, 38),
+        BLSSeries("CES0500000002", "WEEKLY_HOURS", "weekly_hours", False, MONTHLY, 38),
+        BLSSeries("CES0500000003", "HOURLY_EARNINGS", "hourly_earnings", True, MONTHLY, 38),
+        BLSSeries("PRS85006092", "OUTPUT", "output", False, QUARTERLY, 134),
+        BLSSeries("EIUIR", "IMPORT_INDEX", "import_index", True, MONTHLY, 45),
+        BLSSeries("EIUIQ", "EXPORT_INDEX", "export_index", True, MONTHLY, 45),
     ]
 
-    # BLS series IDs
-    SERIES_ID_CPI_U = "CUUR0000SA0L1E"
-    SERIES_ID_CPI_U_ALL_ITEMS = "CUUR0000SA0"
-    SERIES_ID_PPI_FINISHED_GOODS = "WPUFD49207"
-    SERIES_ID_UNEMPLOYMENT = "LNS14000000"
-    SERIES_ID_WEEKLY_HOURS = "CES0500000002"
-    SERIES_ID_HOURLY_EARNINGS = "CES0500000003"
-    SERIES_ID_OUTPUT = "PRS85006092"
-    SERIES_ID_IMPORT_INDEX = "EIUIR"
-    SERIES_ID_EXPORT_INDEX = "EIUIQ"
+    # window feature lengths in periods of each frequency, covering one and three years
+    WINDOWS = {MONTHLY: [12, 36], QUARTERLY: [4, 12]}
+
+    # BLS API v2 per-request limits, registered keys (BLS_API_KEY) get the larger ones
+    API_URL = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+    API_KEY_ENV = "BLS_API_KEY"
+    MAX_SERIES_PER_REQUEST = 25
+    MAX_YEARS_PER_REQUEST = 10
+    MAX_SERIES_PER_REQUEST_REGISTERED = 50
+    MAX_YEARS_PER_REQUEST_REGISTERED = 20
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._set_catalog_columns()
+
+    @classmethod
+    def _set_catalog_columns(cls):
+        """Generates the COLUMN_* attributes and COLUMNS list from the series catalog"""
+        value_columns = []
+        change_columns = []
+        window_columns = []
+        for series in cls.SERIES:
+            prefix = cls._PREFIX_RAW if series.raw else cls._PREFIX
+            setattr(cls, f"COLUMN_{series.key}", prefix + series.name)
+            setattr(cls, f"COLUMN_{series.key}_MOM", cls._PREFIX + series.name + "_mom")
+            setattr(cls, f"COLUMN_{series.key}_YOY", cls._PREFIX + series.name + "_yoy")
+            value_columns.append(getattr(cls, f"COLUMN_{series.key}"))
+            change_columns += [getattr(cls, f"COLUMN_{series.key}_MOM"), getattr(cls, f"COLUMN_{series.key}_YOY")]
+
+            # e.g. COLUMN_CPI_U_ZSCORE12
+            windows = cls.WINDOWS[series.frequency]
+            suffixes = [f"{feature.upper()}{window}" for feature in window_features.FEATURES for window in windows]
+            columns = cls._get_window_feature_columns(getattr(cls, f"COLUMN_{series.key}"), windows)
+            for suffix, column in zip(suffixes, columns):
+                setattr(cls, f"COLUMN_{series.key}_{suffix}", column)
+            window_columns += columns
+
+        cls.COLUMNS = value_columns + change_columns + window_columns
+
+    # relative release calendar paths are resolved against this directory, whose csv files are package data
+    RELEASE_CALENDAR_DIRECTORY = os.path.join(os.path.dirname(__file__), "release_calendars")
 
     def get_data(self, start_date: date, end_date: date) -> pd.DataFrame:
-        # add 18 months of padding to the start date
-        # accounts for delays in reporting and need to calculate 12 month changes
-        padded_start_date = start_date - timedelta(days=549)
-
-        date_df = pd.DataFrame()
-        date_df[self.DATE_COL] = pd.date_range(padded_start_date, end_date)
-        date_df[self.DATE_COL] = date_df[self.DATE_COL].dt.date
+        observations = self._get_observations(
+            [series.series_id for series in self.SERIES],
+            start_date - timedelta(days=self._get_padding_days()),
+            end_date,
+        )
 
-        # Define the URL for the BLS API
-        api_url = "https://api.bls.gov/publicAPI/v2/timeseries/data/"
+        values = {}
+        for series in self.SERIES:
+            values[series] = observations[series.series_id].to_frame(getattr(self, f"COLUMN_{series.key}"))
+
+        graph = self._get_transform_graph()
+        with graph.lock:
+            for series in self.SERIES:
+                # changes are memoized transforms of the native observations, computed before expanding to days
+                graph.add_source(f"bls_{series.name}", values[series])
+                graph.add_transform(
+                    f"bls_{series.name}_changes",
+                    self._get_changes,
+                    [f"bls_{series.name}"],
+                    {
+                        "periods_per_year": series.frequency,
+                        "change_column": getattr(self, f"COLUMN_{series.key}_MOM"),
+                        "yoy_column": getattr(self, f"COLUMN_{series.key}_YOY"),
+                    },
+                )
+
+            # window features are computed for all series of a frequency at once
+            for frequency, windows in self.WINDOWS.items():
+                graph.add_transform(
+                    f"bls_window_features_{frequency}",
+                    self._get_window_features,
+                    [f"bls_{series.name}" for series in self.SERIES if series.frequency == frequency],
+                    {"windows": windows},
+                    [window_features],
+                )
+
+            changes = {series: graph.get(f"bls_{series.name}_changes") for series in self.SERIES}
+            window_features_dfs = {
+                frequency: graph.get(f"bls_window_features_{frequency}") for frequency in self.WINDOWS
+            }
 
+        data = {self.DATE_COL: pd.date_range(start_date, end_date)}
+        for series in self.SERIES:
+            value_column = getattr(self, f"COLUMN_{series.key}")
+            window_columns = self._get_window_feature_columns(value_column, self.WINDOWS[series.frequency])
+            window_features_df = window_features_dfs[series.frequency][window_columns]
+
+            # each series becomes available on its own release dates, so only its periods are kept
+            series_df = pd.concat(
+                [
+                    values[series],
+                    changes[series],
+                    window_features_df.reindex(values[series].index),
+                ],
+                axis=1,
+            )
+            series_df.insert(0, self.DATE_COL, self._get_release_dates(series, values[series].index))
+
+            aligned = self._align_daily(series_df, start_date, end_date)
+            for column in aligned.columns.drop(self.DATE_COL):
+                data[column] = aligned[column].values
+
+        return pd.DataFrame(data)[[self.DATE_COL] + self.COLUMNS]
+
+    @classmethod
+    def _get_padding_days(cls) -> int:
+        """Returns how many days before the start date to fetch, so that year-over-year changes and the longest
+        window are complete for the latest period released by the start date"""
+        padding_days = 0
+        for series in cls.SERIES:
+            periods = max(series.frequency, *cls.WINDOWS[series.frequency])
+            # a period is released release_lag days after it starts, and a period can be up to a quarter long
+            padding_days = max(padding_days, math.ceil(periods * 366 / series.frequency) + series.release_lag + 92)
+        return padding_days
+
+    @staticmethod
+    def _get_changes(values: pd.DataFrame, periods_per_year: int, change_column: str, yoy_column: str) -> pd.DataFrame:
+        value = values.iloc[:, 0]
+        return pd.DataFrame({
+            change_column: value.pct_change(1, fill_method=None),
+            yoy_column: value.pct_change(periods_per_year, fill_method=None),
+        })
+
+    def _plan_requests(self, series_ids: list, start_year: int, end_year: int) -> list:
+        """Splits the series and years into (series_ids, start_year, end_year) requests within the API limits,
+        using the fewest requests a grid of series chunks and year windows allows"""
+        if os.environ.get(self.API_KEY_ENV):
+            max_series, max_years = self.MAX_SERIES_PER_REQUEST_REGISTERED, self.MAX_YEARS_PER_REQUEST_REGISTERED
+        else:
+            max_series, max_years = self.MAX_SERIES_PER_REQUEST, self.MAX_YEARS_PER_REQUEST
+
+        if not series_ids:
+            return []
+
+        # split series into evenly sized chunks rather than full chunks plus a small remainder
+        num_chunks = math.ceil(len(series_ids) / max_series)
+        chunk_size = math.ceil(len(series_ids) / num_chunks)
+        series_chunks = [series_ids[i:i + chunk_size] for i in range(0, len(series_ids), chunk_size)]
+
+        requests_plan = []
+        for window_start in range(start_year, end_year + 1, max_years):
+            window_end = min(window_start + max_years - 1, end_year)
+            requests_plan += [(chunk, window_start, window_end) for chunk in series_chunks]
+
+        return requests_plan
+
+    def _get_observations(self, series_ids: list, start_date: date, end_date: date) -> dict:
+        """Returns a series of values indexed by period start date for each series ID"""
         # Define the BLS API headers
         headers = {"Content-type": "application/json"}
 
-        # Define the BLS API request data
-        series_ids = [
-            self.SERIES_ID_CPI_U,
-            self.SERIES_ID_CPI_U_ALL_ITEMS,
-            self.SERIES_ID_PPI_FINISHED_GOODS,
-            self.SERIES_ID_UNEMPLOYMENT,
-            self.SERIES_ID_WEEKLY_HOURS,
-            self.SERIES_ID_HOURLY_EARNINGS,
-            self.SERIES_ID_OUTPUT,
-            self.SERIES_ID_IMPORT_INDEX,
-            self.SERIES_ID_EXPORT_INDEX,
-        ]
-
-        combined_df = pd.DataFrame()
-
-        total_years = end_date.year - padded_start_date.year + 1
-        num_requests = math.ceil(total_years / 10.0)
-
-        for i in range(num_requests):
-            # Calculate the start and end years for the current request
-            start_year = padded_start_date.year + i * 10
-            end_year = min(start_year + 9, end_date.year)
-
+        series_data = {series_id: {} for series_id in series_ids}
 
+        for request_series_ids, start_year, end_year in self._plan_requests(
+            series_ids, start_date.year, end_date.year
+        ):
             request_data = {
-                "seriesid": series_ids,
+                "seriesid": request_series_ids,
                 "startyear": str(start_year),
                 "endyear": str(end_year),
             }
+            if os.environ.get(self.API_KEY_ENV):
+                request_data["registrationkey"] = os.environ[self.API_KEY_ENV]
 
             # Send request to the BLS API
-            response = requests.post(api_url, headers=headers, json=request_data)
-
-            # Check if the request was successful
-            if response.status_code == 200:
-                request_df = pd.DataFrame()
-
-                json_response = response.json()
-
-                for series in json_response["Results"]["series"]:
-                    series_id = series["seriesID"]
-                    series_data = series["data"]
-
-                    # Extract values and dates
-                    values = [float(data_point["value"]) for data_point in series_data]
-                    dates = []
-                    for data_point in series_data:
-                        if data_point["period"][0] == "Q":
-                            quarter_num = int(data_point["period"][1:])
-                            year = int(data_point["year"])
-                            month = (quarter_num - 1) * 3 + 1
-                            date = pd.to_datetime(f"{year}-{month}-01")
-                        else:
-                            date = pd.to_datetime(data_point["year"] + "-" + data_point["period"][1:])
-                        dates.append(date)
-
-                    # Create DataFrame for the series data
-                    series_df = pd.DataFrame({self.DATE_COL: dates, series_id: values})
-                    series_df = series_df.set_index(self.DATE_COL)
-
-                     # Merge the series data into the combined DataFrame
-                    if request_df.empty:
-                        request_df = series_df
-                    else:
-                        request_df = pd.merge(request_df, series_df, left_index=True, right_index=True, how='outer')
-
-                # Merge the request data into the combined DataFrame
-                if combined_df.empty:
-                    combined_df = request_df
-                else:
-                    combined_df = pd.concat([combined_df, request_df])
-
-            else:
-                print(f"Error occurred while fetching data for series ID: {series_id}")
+            response = requests.post(
+                self.API_URL, headers=headers, json=request_data, timeout=self.REQUEST_TIMEOUT
+            )
+
+            # Check if the request was successful, requests over the daily limit are rejected with a 200 status
+            json_response = response.json() if response.status_code == 200 else {}
+            if json_response.get("status") != "REQUEST_SUCCEEDED":
+                print(f"Error occurred while fetching data for series IDs: {request_series_ids}")
                 raise Exception(response.text)
 
-        # rename columns
-        combined_df.rename(
-            columns={
-                self.SERIES_ID_CPI_U: self.COLUMN_CPI_U,
-                self.SERIES_ID_CPI_U_ALL_ITEMS: self.COLUMN_CPI_U_ALL,
-                self.SERIES_ID_PPI_FINISHED_GOODS: self.COLUMN_PPI_FINISHED,
-                self.SERIES_ID_UNEMPLOYMENT: self.COLUMN_UE,
-                self.SERIES_ID_WEEKLY_HOURS: self.COLUMN_WEEKLY_HOURS,
-                self.SERIES_ID_HOURLY_EARNINGS: self.COLUMN_HOURLY_EARNINGS,
-                self.SERIES_ID_OUTPUT: self.COLUMN_OUTPUT,
-                self.SERIES_ID_IMPORT_INDEX: self.COLUMN_IMPORT_INDEX,
-                self.SERIES_ID_EXPORT_INDEX: self.COLUMN_EXPORT_INDEX,
-            },
-            inplace=True,
-        )
-
-        # calculate month-over-month and year-over-year changes
-        combined_df[self.COLUMN_CPI_U_MOM] = combined_df[self.COLUMN_CPI_U].pct_change(1)
-        combined_df[self.COLUMN_CPI_U_YOY] = combined_df[self.COLUMN_CPI_U].pct_change(12)
-        combined_df[self.COLUMN_CPI_U_ALL_MOM] = combined_df[self.COLUMN_CPI_U_ALL].pct_change(1)
-        combined_df[self.COLUMN_CPI_U_ALL_YOY] = combined_df[self.COLUMN_CPI_U_ALL].pct_change(12)
-        combined_df[self.COLUMN_PPI_FINISHED_MOM] = combined_df[self.COLUMN_PPI_FINISHED].pct_change(1)
-        combined_df[self.COLUMN_PPI_FINISHED_YOY] = combined_df[self.COLUMN_PPI_FINISHED].pct_change(12)
-        combined_df[self.COLUMN_UE_MOM] = combined_df[self.COLUMN_UE].pct_change(1)
-        combined_df[self.COLUMN_UE_YOY] = combined_df[self.COLUMN_UE].pct_change(12)
-        combined_df[self.COLUMN_WEEKLY_HOURS_MOM] = combined_df[self.COLUMN_WEEKLY_HOURS].pct_change(1)
-        combined_df[self.COLUMN_WEEKLY_HOURS_YOY] = combined_df[self.COLUMN_WEEKLY_HOURS].pct_change(12)
-        combined_df[self.COLUMN_HOURLY_EARNINGS_MOM] = combined_df[self.COLUMN_HOURLY_EARNINGS].pct_change(1)
-        combined_df[self.COLUMN_HOURLY_EARNINGS_YOY] = combined_df[self.COLUMN_HOURLY_EARNINGS].pct_change(12)
-        combined_df[self.COLUMN_OUTPUT_MOM] = combined_df[self.COLUMN_OUTPUT].pct_change(1)
-        combined_df[self.COLUMN_OUTPUT_YOY] = combined_df[self.COLUMN_OUTPUT].pct_change(12)
-        combined_df[self.COLUMN_IMPORT_INDEX_MOM] = combined_df[self.COLUMN_IMPORT_INDEX].pct_change(1)
-        combined_df[self.COLUMN_IMPORT_INDEX_YOY] = combined_df[self.COLUMN_IMPORT_INDEX].pct_change(12)
-        combined_df[self.COLUMN_EXPORT_INDEX_MOM] = combined_df[self.COLUMN_EXPORT_INDEX].pct_change(1)
-        combined_df[self.COLUMN_EXPORT_INDEX_YOY] = combined_df[self.COLUMN_EXPORT_INDEX].pct_change(12)
-
-        # convert date column to datetime
-        combined_df = combined_df.reset_index()
-        combined_df[self.DATE_COL] = pd.to_datetime(combined_df[self.DATE_COL])
-        combined_df[self.DATE_COL] = combined_df[self.DATE_COL].dt.date
-
-        # merge market data with date data to fill in missing dates
-        data = pd.merge(date_df, combined_df, on=self.DATE_COL, how="left").ffill()
-
-        # shift each column based on its release schedule
-        data[self.COLUMN_CPI_U] = data[self.COLUMN_CPI_U].shift(48)
-        data[self.COLUMN_CPI_U_ALL] = data[self.COLUMN_CPI_U_ALL].shift(48)
-        data[self.COLUMN_PPI_FINISHED] = data[self.COLUMN_PPI_FINISHED].shift(45)
-        data[self.COLUMN_UE] = data[self.COLUMN_UE].shift(38)
-        data[self.COLUMN_WEEKLY_HOURS] = data[self.COLUMN_WEEKLY_HOURS].shift(38)
-        data[self.COLUMN_HOURLY_EARNINGS] = data[self.COLUMN_HOURLY_EARNINGS].shift(38)
-        data[self.COLUMN_OUTPUT] = data[self.COLUMN_OUTPUT].shift(134)
-        data[self.COLUMN_IMPORT_INDEX] = data[self.COLUMN_IMPORT_INDEX].shift(45)
-        data[self.COLUMN_EXPORT_INDEX] = data[self.COLUMN_EXPORT_INDEX].shift(45)
-
-        data = data[(data[self.DATE_COL] >= start_date)][[self.DATE_COL] + self.COLUMNS]
-
-        return data
+            for series in json_response["Results"]["series"]:
+                for data_point in series["data"]:
+                    period = data_point["period"]
+                    if period[0] == "Q":
+                        month = (int(period[1:]) - 1) * 3 + 1
+                    else:
+                        month = int(period[1:])
+                    period_date = pd.Timestamp(int(data_point["year"]), month, 1)
+                    series_data[series["seriesID"]][period_date] = float(data_point["value"])
+
+        return {
+            series_id: pd.Series(
+                list(values.values()), index=pd.DatetimeIndex(list(values)), dtype="float64"
+            ).sort_index()
+            for series_id, values in series_data.items()
+        }
+
+    def _get_release_dates(self, series: BLSSeries, periods: pd.DatetimeIndex) -> pd.DatetimeIndex:
+        """Returns the date each observation period becomes available"""
+        release_dates = periods + pd.Timedelta(days=series.release_lag)
+
+        if series.release_calendar is not None:
+            calendar = pd.read_csv(
+                os.path.join(self.RELEASE_CALENDAR_DIRECTORY, series.release_calendar),
+                parse_dates=["period", "release_date"],
+            )
+            # releases go out at 8:30 ET, after the noon UTC cutoff, so they are usable the following day
+            calendar_dates = calendar.drop_duplicates("period", keep="last").set_index("period")["release_date"]
+            calendar_dates = calendar_dates.reindex(periods) + pd.Timedelta(days=1)
+            release_dates = pd.DatetimeIndex(calendar_dates.fillna(pd.Series(release_dates, index=periods)))
+
+        return release_dates
 
     def get_columns(self) -> list:
         return self.COLUMNS
+
+
+DataSourceBLS._set_catalog_columns()
@@ -20,7 +20,6 @@ class DataSourceCalendar(BaseDataSource):
         data[self.COLUMN_MONTH] = data[self.DATE_COL].dt.month
         data[self.COLUMN_QUARTER] = data[self.DATE_COL].dt.quarter
         data[self.COLUMN_YEAR] = data[self.DATE_COL].dt.year
-        data[self.DATE_COL] = data[self.DATE_COL].dt.date
 
         return data
 
@@ -1,12 +1,44 @@
+import functools
+import os
+import threading
 from datetime import date, datetime, timedelta
 
 import pandas as pd
 import pytz
 import yfinance as yf
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+)
+from pandas.tseries.offsets import CustomBusinessDay
 
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 
 
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    # regular NYSE holidays, one-off closures are covered by the look-back margin
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
 class DataSourceMarkets(BaseDataSource):
     _PREFIX = BaseDataSource._BASE_PREFIX + "markets_"
     _PREFIX_RAW = BaseDataSource._BASE_PREFIX_RAW + "markets_"
@@ -14,6 +46,13 @@ class DataSourceMarkets(BaseDataSource):
     _PREFIX_SPX_EMA = _PREFIX_RAW + "spx_ema_"
     _PREFIX_SPX_RETURN = _PREFIX + "spx_return_"
     _TIME_WINDOWS = [10, 20, 50, 100, 200]
+    _RELEASE_LAG_DAYS = 1
+    _TICKER = "^SPX"
+    # returns over the longest window need one more close than the window
+    _LOOKBACK_TRADING_DAYS = max(_TIME_WINDOWS) + 1
+    _LOOKBACK_MARGIN_TRADING_DAYS = 5
+    # finalized closes are cached so repeated updates only download the trading days they have not seen
+    CLOSE_CACHE_FILE = os.path.join(BaseDataSource.CACHE_DIRECTORY, "markets_spx_close.parquet")
 
     # columns
     COLUMN_SPX_CLOSE = _PREFIX_RAW + "spx_close"
@@ -32,58 +71,133 @@ class DataSourceMarkets(BaseDataSource):
             self.COLUMNS.append(getattr(self, f"COLUMN_SPX_RETURN{i}"))
 
     def get_data(self, start_date: date, end_date: date) -> pd.DataFrame:
-        # adjusted close is more accurate than close
-        CLOSE_COL = "Close"
+        # remove any data corresponding to future date (in eastern tz) as it may not be complete
+        today = datetime.now(pytz.timezone("US/Eastern")).date()
+        end_date = min(end_date, today)
+
+        # each close becomes available one day after its trading date, so the grid needs closes before end_date and
+        # the indicators need the longest window of trading days before start_date
+        lookback_start_date = (
+            pd.Timestamp(start_date)
+            - (self._LOOKBACK_TRADING_DAYS + self._LOOKBACK_MARGIN_TRADING_DAYS) * self._get_trading_day()
+        ).date()
+        closes = self._get_closes(lookback_start_date, end_date, today)
+
+        # moving averages, exponential moving averages and returns are memoized transforms of the closes
+        graph = self._get_transform_graph()
+        with graph.lock:
+            graph.add_source("markets_spx_close", closes)
+            graph.add_transform(
+                "markets_spx_sma",
+                self._get_sma,
+                ["markets_spx_close"],
+                {"windows": self._TIME_WINDOWS, "prefix": self._PREFIX_SPX_SMA},
+            )
+            graph.add_transform(
+                "markets_spx_ema",
+                self._get_ema,
+                ["markets_spx_close"],
+                {"windows": self._TIME_WINDOWS, "prefix": self._PREFIX_SPX_EMA},
+            )
+            graph.add_transform(
+                "markets_spx_return",
+                self._get_returns,
+                ["markets_spx_close"],
+                {"windows": self._TIME_WINDOWS, "prefix": self._PREFIX_SPX_RETURN},
+            )
+
+            data = pd.concat(
+                [closes, graph.get("markets_spx_sma"), graph.get("markets_spx_ema"), graph.get("markets_spx_return")],
+                axis=1,
+            ).reset_index()
 
-        # get 300 calendar days of padding for the 200 day moving average calculation
-        padded_start_date = start_date - timedelta(days=300)
+        # data is not finalized until around midnight Eastern time
+        data = self._align_daily(
+            data[[self.DATE_COL] + self.get_columns()],
+            start_date,
+            end_date,
+            {column: self._RELEASE_LAG_DAYS for column in self.get_columns()},
+        )
 
-        # dataframe with all dates including weekends and holidays
-        date_df = pd.DataFrame()
-        date_df[self.DATE_COL] = pd.date_range(padded_start_date, end_date)
-        date_df[self.DATE_COL] = date_df[self.DATE_COL].dt.date
+        return data
 
-        # dataframe with only trading days
-        data = yf.download("^SPX", start=padded_start_date, end=end_date)
+    def _get_closes(self, start_date: date, end_date: date, today: date) -> pd.DataFrame:
+        """Returns closes from start_date, or the start of the close cache if it is earlier, up to but excluding
+        end_date. Only trading days missing from the cache are downloaded, so the closes stay contiguous and
+        exponential moving averages start from the same close in every update"""
+        cached = self._read_close_cache()
+        closes = [cached]
+
+        if cached.empty:
+            closes.append(self._download_closes(start_date, end_date))
+        else:
+            first_date = cached.index[0].date()
+            last_date = cached.index[-1].date()
+            trading_day = self._get_trading_day()
+            if len(pd.date_range(start_date, first_date - timedelta(days=1), freq=trading_day)) > 0:
+                closes.insert(0, self._download_closes(start_date, first_date))
+            if len(pd.date_range(last_date + timedelta(days=1), end_date - timedelta(days=1), freq=trading_day)) > 0:
+                closes.append(self._download_closes(last_date + timedelta(days=1), end_date))
+
+        closes = pd.concat(closes).sort_index()
+        closes = closes[~closes.index.duplicated(keep="last")]
+
+        # only closes before today are final
+        finalized = closes[closes.index < pd.Timestamp(today)]
+        if len(finalized) > len(cached):
+            self._write_close_cache(finalized)
+
+        return closes[closes.index < pd.Timestamp(end_date)]
+
+    def _download_closes(self, start_date: date, end_date: date) -> pd.DataFrame:
+        # adjusted close is more accurate than close
+        CLOSE_COL = "Close"
+
+        # dataframe with only trading days, end is exclusive
+        data = yf.download(self._TICKER, start=start_date, end=end_date, timeout=self.REQUEST_TIMEOUT)
 
         if isinstance(data.columns, pd.MultiIndex):
             # Extract just the first element of each tuple for column names
             data.columns = [col[0] for col in data.columns]
 
-        data = data.reset_index()
-
-        # calculate moving averages
-        for i in self._TIME_WINDOWS:
-            data[getattr(self, f"COLUMN_SPX_SMA{i}")] = data[CLOSE_COL].rolling(window=i).mean()
-
-        # calculate exponential moving averages
-        for i in self._TIME_WINDOWS:
-            data[getattr(self, f"COLUMN_SPX_EMA{i}")] = data[CLOSE_COL].ewm(span=i, adjust=False).mean()
-
-        # calculate returns
-        for i in self._TIME_WINDOWS:
-            data[getattr(self, f"COLUMN_SPX_RETURN{i}")] = data[CLOSE_COL].pct_change(periods=i)
-
-        data.rename(columns={"Date": self.DATE_COL, CLOSE_COL: self.COLUMN_SPX_CLOSE}, inplace=True)
-
-        # data is not finalized until around midnight Eastern time
-        # add one day to date column to align with data availability
-        data[self.DATE_COL] = data[self.DATE_COL].dt.date + timedelta(days=1)
-
-        # merge market data with date data to fill in missing dates
-        data = pd.merge(date_df, data, on=self.DATE_COL, how="left").ffill()
-
-        # remove any data corresponding to future date (in eastern tz) as it may not be complete
-        data = data[data[self.DATE_COL] <= datetime.now(pytz.timezone("US/Eastern")).date()]
-
-        # filter out data outside of the requested date range
-        data = data[(data[self.DATE_COL] >= start_date) & (data[self.DATE_COL] <= end_date)]
-
-        # filter columns
-        final_columns = [self.DATE_COL] + self.get_columns()
-        data = data[final_columns]
-
-        return data
+        if data.empty:
+            return pd.DataFrame({self.COLUMN_SPX_CLOSE: []}, index=pd.DatetimeIndex([], name=self.DATE_COL))
+
+        closes = data[[CLOSE_COL]].rename(columns={CLOSE_COL: self.COLUMN_SPX_CLOSE}).rename_axis(self.DATE_COL)
+        closes.index = pd.to_datetime(closes.index).tz_localize(None)
+        return closes
+
+    def _read_close_cache(self) -> pd.DataFrame:
+        if not os.path.exists(self.CLOSE_CACHE_FILE):
+            return pd.DataFrame({self.COLUMN_SPX_CLOSE: []}, index=pd.DatetimeIndex([], name=self.DATE_COL))
+        return pd.read_parquet(self.CLOSE_CACHE_FILE)
+
+    def _write_close_cache(self, closes: pd.DataFrame):
+        # write to a temporary file and rename it, so concurrent updates never read a partially written file
+        os.makedirs(os.path.dirname(self.CLOSE_CACHE_FILE), exist_ok=True)
+        temp_file = f"{self.CLOSE_CACHE_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+        closes.to_parquet(temp_file)
+        os.replace(temp_file, self.CLOSE_CACHE_FILE)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_trading_day() -> CustomBusinessDay:
+        return CustomBusinessDay(calendar=NYSEHolidayCalendar())
+
+    @staticmethod
+    def _get_sma(closes: pd.DataFrame, windows: list, prefix: str) -> pd.DataFrame:
+        close = closes.iloc[:, 0]
+        return pd.DataFrame({prefix + str(i): close.rolling(window=i).mean() for i in windows})
+
+    @staticmethod
+    def _get_ema(closes: pd.DataFrame, windows: list, prefix: str) -> pd.DataFrame:
+        close = closes.iloc[:, 0]
+        return pd.DataFrame({prefix + str(i): close.ewm(span=i, adjust=False).mean() for i in windows})
+
+    @staticmethod
+    def _get_returns(closes: pd.DataFrame, windows: list, prefix: str) -> pd.DataFrame:
+        close = closes.iloc[:, 0]
+        return pd.DataFrame({prefix + str(i): close.pct_change(periods=i) for i in windows})
 
     def get_columns(self) -> list:
         return self.COLUMNS
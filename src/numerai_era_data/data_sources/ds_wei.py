@@ -1,49 +1,60 @@
-from datetime import date, timedelta
+import io
+from datetime import date
 
 import pandas as pd
 import requests
 
+import numerai_era_data.window_features as window_features
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 
 
 class DataSourceWEI(BaseDataSource):
     _PREFIX = BaseDataSource._BASE_PREFIX + "wei_"
 
+    # window feature lengths in weeks, covering a quarter and a year
+    WINDOWS = [13, 52]
+
     # columns
     COLUMN_WEI = _PREFIX + "wei"
-    COLUMNS = [COLUMN_WEI]
-
-    def get_data(self, start_date: date, end_date: date) -> pd.DataFrame:
-        # add 13 days of padding
-        padded_start_date = start_date - timedelta(days=13)
+    COLUMNS = [COLUMN_WEI] + BaseDataSource._get_window_feature_columns(COLUMN_WEI, WINDOWS)
 
-        date_df = pd.DataFrame()
-        date_df[self.DATE_COL] = pd.date_range(padded_start_date, end_date)
-        date_df[self.DATE_COL] = date_df[self.DATE_COL].dt.date
+    _RELEASE_LAG_DAYS = 6
 
+    def get_data(self, start_date: date, end_date: date) -> pd.DataFrame:
         # URL of the weekly economic index data
         url = "https://fred.stlouisfed.org/graph/fredgraph.csv?id=WEI"
 
         # Make the HTTP request to fetch the data
-        response = requests.get(url)
+        response = requests.get(url, timeout=self.REQUEST_TIMEOUT)
         response.raise_for_status()
 
         # Create a DataFrame from the CSV data
-        wei_df = pd.read_csv(url)
+        wei_df = pd.read_csv(io.StringIO(response.text))
 
         # rename columns
         wei_df.rename(columns={"DATE": self.DATE_COL, "WEI": self.COLUMN_WEI}, inplace=True)
 
-        # convert date column to datetime
+        # convert date column to datetime and values to floats
         wei_df[self.DATE_COL] = pd.to_datetime(wei_df[self.DATE_COL])
+        wei_df[self.COLUMN_WEI] = pd.to_numeric(wei_df[self.COLUMN_WEI], errors="coerce")
+
+        # window features are memoized transforms of the weekly observations, computed before expanding to days
+        values = wei_df.set_index(self.DATE_COL)[[self.COLUMN_WEI]]
+        graph = self._get_transform_graph()
+        with graph.lock:
+            graph.add_source("wei", values)
+            graph.add_transform(
+                "wei_window_features", self._get_window_features, ["wei"], {"windows": self.WINDOWS}, [window_features]
+            )
+            wei_df = pd.concat([values, graph.get("wei_window_features")], axis=1).reset_index()
 
         # data is not ready until after noon UTC on Thursday, dates are for previous Saturday
-        wei_df[self.DATE_COL] = wei_df[self.DATE_COL].dt.date + timedelta(days=6)
-
-        # merge market data with date data to fill in missing dates
-        data = pd.merge(date_df, wei_df, on=self.DATE_COL, how="left").ffill()
-
-        data = data[(data[self.DATE_COL] >= start_date)]
+        data = self._align_daily(
+            wei_df[[self.DATE_COL] + self.COLUMNS],
+            start_date,
+            end_date,
+            {column: self._RELEASE_LAG_DAYS for column in self.COLUMNS},
+        )
 
         return data
 
@@ -1,5 +1,7 @@
 from datetime import date, datetime, timedelta, timezone
 
+import numpy as np
+
 ERA_ONE_START = date(2003, 1, 11)
 
 
@@ -21,3 +23,9 @@ def get_era_for_date(date: date) -> int:
 
 def get_date_for_era(era: int) -> date:
     return ERA_ONE_START + timedelta(days=(era - 1) * 7)
+
+
+def get_eras_for_dates(dates: np.ndarray) -> np.ndarray:
+    # vectorized get_era_for_date over datetime64 values
+    days = (dates.astype("datetime64[D]") - np.datetime64(ERA_ONE_START, "D")).astype(np.int64)
+    return days // 7 + 1
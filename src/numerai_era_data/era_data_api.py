@@ -1,142 +1,770 @@
+import asyncio
+import contextlib
+import functools
 import importlib
 import inspect
+import json
 import logging
 import os
 import pkgutil
+import threading
+from datetime import datetime, time
+from time import monotonic
+from typing import TYPE_CHECKING
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import requests
 
 import numerai_era_data.date_utils as date_utils
+import numerai_era_data.era_data_server as era_data_server
+import numerai_era_data.era_similarity as era_similarity
+import numerai_era_data.parquet_writer as parquet_writer
+import numerai_era_data.shared_era_data as shared_era_data
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 
+if TYPE_CHECKING:
+    import polars as pl
+
+
+class CircuitBreaker:
+    """Tracks consecutive failures of a data source. After FAILURE_THRESHOLD failures in a row the breaker opens and
+    the source is skipped until RESET_SECONDS have passed, then a single trial fetch decides whether it closes again"""
+
+    FAILURE_THRESHOLD = 3
+    RESET_SECONDS = 15 * 60
+
+    def __init__(self):
+        self.failures = 0
+        self.opened_at = None
+        # concurrent era and daily refreshes record fetches of the same source from executor threads
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if monotonic() - self.opened_at < self.RESET_SECONDS:
+                return False
+            # half open, a failed trial fetch reopens the breaker immediately
+            self.opened_at = None
+            self.failures = self.FAILURE_THRESHOLD - 1
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.FAILURE_THRESHOLD:
+                self.opened_at = monotonic()
+
 
 class EraDataAPI:
     CACHE_DIRECTORY = os.path.join(os.path.dirname(__file__), 'cache')
     DATA_CACHE_FILE = os.path.join(CACHE_DIRECTORY, 'data.parquet')
     DAILY_CACHE_FILE = os.path.join(CACHE_DIRECTORY, 'daily.parquet')
+    SERVER_URL_ENV = "NUMERAI_ERA_DATA_SERVER"
+    SERVER_TIMEOUT = 60
+    ENGINES = ["pandas", "polars"]
+    # parquet metadata key of the schema manifest, the version and columns of each data source in a cache file
+    MANIFEST_KEY = b"numerai_era_data.manifest"
+    PARQUET_WRITER_CONFIG = parquet_writer.DEFAULT_CONFIG
+    # incremental updates refetch this many eras before the last cached era to pick up revised observations
+    INCREMENTAL_REFETCH_ERAS = 26
+
+    # circuit breakers are shared by all instances in the process, keyed by data source class
+    _circuit_breakers = {}
+    _circuit_breakers_lock = threading.Lock()
+
+    # parquet cache files and their manifests read or written in this process, keyed by absolute path and validated
+    # by file stat, so instances share one copy of the data and only reread a file after it changes on disk
+    # frames returned by the API are shared between instances and must not be modified in place
+    _file_cache = {}
+    _file_cache_lock = threading.Lock()
+    _discovered_data_sources = None
+    # names of the in-flight async updates
+    _DATA_TASK = "data"
+    _DAILY_TASK = "daily"
+
+    def __init__(self, server_url: str = None, engine: str = "pandas"):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine {engine}, expected one of {self.ENGINES}")
+        if engine == "polars":
+            try:
+                import polars  # noqa: F401
+            except ImportError as e:
+                raise ImportError("The polars engine requires polars, install numerai-era-data[polars]") from e
+        self.engine = engine
 
-    def __init__(self):
-        dir_name = os.path.dirname(self.DATA_CACHE_FILE)
-        if not os.path.exists(dir_name):
-            os.makedirs(dir_name)
+        # in client mode the era data server owns the cache, so nothing is read from or written to disk
+        self.server_url = server_url if server_url is not None else os.environ.get(self.SERVER_URL_ENV)
+        self.class_cache = []
+        self._data_table = (None, None)
+        self._data_cache_key = None
+        self._daily_cache_key = None
+        # None for caches written without a manifest
+        self.data_manifest = None
+        self.daily_manifest = None
+        self._last_era = (None, None)
+        self._similarity_index = (None, None)
+        self._schema_changes = {}
+        self._in_flight = {}
 
-        if os.path.exists(self.DATA_CACHE_FILE):
-            self.data_cache = pd.read_parquet(self.DATA_CACHE_FILE)
-        else:
-            self.data_cache = pd.DataFrame()
+        # logger config
+        logging.basicConfig(filename="exception.log", level=logging.ERROR)
 
-        if os.path.exists(self.DAILY_CACHE_FILE):
-            self.daily_cache = pd.read_parquet(self.DAILY_CACHE_FILE)
-        else:
+        if self.server_url:
+            self.data_cache = pd.DataFrame()
             self.daily_cache = pd.DataFrame()
+            return
 
-        self.class_cache = []
+        dir_name = os.path.dirname(self.DATA_CACHE_FILE)
+        if not os.path.exists(dir_name):
+            os.makedirs(dir_name)
 
-        # logger config
-        logging.basicConfig(filename="exception.log", level=logging.ERROR)
+        self._data_cache_key, self.data_cache, self.data_manifest = self._read_cache_file(self.DATA_CACHE_FILE)
+        self._daily_cache_key, self.daily_cache, self.daily_manifest = self._read_cache_file(self.DAILY_CACHE_FILE)
 
     def get_all_eras(self, update_if_stale=True) -> pd.DataFrame:
-        update = False
+        if self.server_url:
+            # a client has no local cache to fall back on, so empty data is fetched whatever update_if_stale says
+            if self.data_cache.empty or (update_if_stale and self._is_data_cache_stale()):
+                self.data_cache = self._get_from_server(era_data_server.ERAS_PATH)
+            return self.data_cache
+
+        self._sync_cache_files()
 
         if update_if_stale:
-            # if most current era is not in the data, update the data
-            if self.data_cache.empty or self.data_cache[BaseDataSource.ERA_COL].astype(int).max() < date_utils.get_current_era():
-                update = True
+            # if most current era is not in the data, update the data, which also migrates its schema
+            if self._is_data_cache_stale():
+                self.update_data(incremental=True)
+                return self.data_cache
+
+            # otherwise only sources with added columns or a new version are fetched, and removed columns are dropped
+            outdated_sources, removed_columns = self._migrate_data_schema()
+            if outdated_sources:
+                self.update_data(outdated_sources)
+            elif removed_columns:
+                self._write_data_cache()
 
-            # if any columns have been added since the last update, update the data
-            for data_source_class in self._get_data_sources():
-                data_source = data_source_class()
-                if not set(data_source.get_columns()).issubset(set(self.data_cache.columns)):
-                    update = True
-                    break
+        return self.data_cache
+
+    async def aget_all_eras(self, update_if_stale=True) -> pd.DataFrame:
+        """Returns the era data like get_all_eras without blocking the event loop. Current cached data is returned
+        directly, and concurrent callers that find it stale share a single refresh"""
+        if self.server_url:
+            # a client has no local cache to fall back on, so empty data is fetched whatever update_if_stale says
+            if self.data_cache.empty or (update_if_stale and self._is_data_cache_stale()):
+                await self._run_in_flight(self._DATA_TASK, self._arefresh_data, coalesce=True)
+            return self.data_cache
 
-        if update:
-            self.update_data()
+        if self._is_cache_file_changed(self.DATA_CACHE_FILE, self._data_cache_key):
+            await asyncio.get_running_loop().run_in_executor(None, self._sync_cache_files)
+
+        if update_if_stale and self._is_data_update_needed():
+            await self._run_in_flight(self._DATA_TASK, self._arefresh_data, coalesce=True)
 
         return self.data_cache
 
-    def get_current_daily(self, update_if_stale=True) -> pd.DataFrame:
-        update = False
+    def get_all_eras_arrow(self, update_if_stale=True) -> pa.Table:
+        data_cache = self.get_all_eras(update_if_stale)
 
-        if update_if_stale:
-            # if most current era is not in the data, update the data
-            if self.daily_cache.empty or self.daily_cache[BaseDataSource.DATE_COL][0] != date_utils.get_current_date():
-                update = True
+        # the polars engine keeps the arrow table it built the cache from, so no conversion is needed
+        cached_data, table = self._data_table
+        if cached_data is not data_cache:
+            table = pa.Table.from_pandas(data_cache, preserve_index=False)
+            self._data_table = (data_cache, table)
+
+        return table
+
+    def get_similar_eras(self, k: int = 10, update_if_stale=True) -> pd.DataFrame:
+        """Returns the k historical eras most similar to the current daily data, closest first"""
+        index = self.get_similarity_index(update_if_stale)
+        return index.query(self.get_current_daily(update_if_stale), k)
+
+    def get_similarity_index(self, update_if_stale=True) -> "era_similarity.EraSimilarityIndex":
+        data_cache = self.get_all_eras(update_if_stale)
 
-            # if any columns have been added since the last update, update the data
-            for data_source_class in self._get_data_sources():
-                data_source = data_source_class()
-                if not set(data_source.get_columns()).issubset(set(self.daily_cache.columns)):
-                    update = True
-                    break
+        # after an update only the new eras and the last indexed era, which may have been revised, are added
+        indexed_data, index = self._similarity_index
+        if index is None or index.columns != era_similarity.get_feature_columns(data_cache):
+            index = era_similarity.EraSimilarityIndex(data_cache)
+        elif indexed_data is not data_cache:
+            index.add(data_cache[data_cache[BaseDataSource.ERA_COL] >= max(index.eras)])
+        self._similarity_index = (data_cache, index)
 
-        if update:
-            self.update_daily_data()
+        return index
+
+    def publish_all_eras(self, update_if_stale=True, path: str = None) -> "shared_era_data.SharedEraData":
+        """Publishes the era data for worker processes, which attach to publication.descriptor with
+        shared_era_data.attach. The data is published to shared memory, or to a memory-mapped .npy file if a path
+        is given, and the publication should be closed once the workers are done"""
+        return shared_era_data.SharedEraData(self.get_all_eras(update_if_stale), path)
+
+    def get_current_daily(self, update_if_stale=True) -> pd.DataFrame:
+        if self.server_url:
+            # a client has no local cache to fall back on, so empty data is fetched whatever update_if_stale says
+            if self.daily_cache.empty or (update_if_stale and self._is_daily_cache_stale()):
+                self.daily_cache = self._get_from_server(era_data_server.DAILY_PATH)
+            return self.daily_cache
+
+        self._sync_cache_files()
+
+        if update_if_stale:
+            # if most current era is not in the data, update the data, which also migrates its schema
+            if self._is_daily_cache_stale():
+                self.update_daily_data()
+                return self.daily_cache
+
+            # otherwise only sources with added columns or a new version are fetched, and removed columns are dropped
+            outdated_sources, removed_columns = self._migrate_daily_schema()
+            if outdated_sources:
+                self.update_daily_data(outdated_sources)
+            elif removed_columns:
+                self._write_daily_cache()
 
         return self.daily_cache
 
-    def update_data(self):
-        # update the cache
-        new_data = pd.DataFrame()
-        start_date = date_utils.get_date_for_era(1)
-        end_date = date_utils.get_date_for_era(date_utils.get_current_era())
-        
-        for data_source_class in self._get_data_sources():
-            data_source = data_source_class()
+    async def aget_current_daily(self, update_if_stale=True) -> pd.DataFrame:
+        """Returns the daily data like get_current_daily without blocking the event loop. Current cached data is
+        returned directly, and concurrent callers that find it stale share a single refresh"""
+        if self.server_url:
+            # a client has no local cache to fall back on, so empty data is fetched whatever update_if_stale says
+            if self.daily_cache.empty or (update_if_stale and self._is_daily_cache_stale()):
+                await self._run_in_flight(self._DAILY_TASK, self._arefresh_daily, coalesce=True)
+            return self.daily_cache
 
-            try:
-                data = data_source.get_data(start_date, end_date)
-            except Exception as e:
-                logging.exception(
-                    f"Error getting data from {data_source_class.__name__}: {e} on {start_date} to {end_date}"
-                )
-                data = pd.DataFrame()
-                data[BaseDataSource.DATE_COL] = pd.date_range(start_date, end_date)
-                data[BaseDataSource.DATE_COL] = data[BaseDataSource.DATE_COL].dt.date
-                data[data_source.get_columns()] = None
+        if self._is_cache_file_changed(self.DAILY_CACHE_FILE, self._daily_cache_key):
+            await asyncio.get_running_loop().run_in_executor(None, self._sync_cache_files)
 
-            new_data = data if new_data.empty else pd.merge(new_data, data, how="outer", on=BaseDataSource.DATE_COL)
+        if update_if_stale and self._is_daily_update_needed():
+            await self._run_in_flight(self._DAILY_TASK, self._arefresh_daily, coalesce=True)
 
-        new_data[BaseDataSource.ERA_COL] = new_data[BaseDataSource.DATE_COL].apply(date_utils.get_era_for_date).astype(str).str.zfill(4)
-        new_data = new_data.fillna(method="ffill")
-        new_data = new_data.drop_duplicates(subset=[BaseDataSource.ERA_COL], keep="last")
-        new_data = new_data.reindex(columns=[BaseDataSource.ERA_COL] 
-                                    + new_data.columns.difference([BaseDataSource.ERA_COL]).tolist())
-        new_data = new_data.drop(columns=[BaseDataSource.DATE_COL])
-        self.data_cache = new_data.reset_index(drop=True)
+        return self.daily_cache
 
-        # write cache to disk
-        self.data_cache.to_parquet(self.DATA_CACHE_FILE)
+    def update_data(self, data_sources: list = None, incremental: bool = False):
+        # update the cache, if data sources are given only they are fetched and other columns keep their cached values
+        # sources that fail or are skipped by their circuit breaker also keep their cached values
+        # if incremental, sources whose columns are all cached at their current version only fetch the most recent eras
+        manifest, end_date, fetches = self._plan_data_update(data_sources, incremental)
+        results = [self._fetch_data(*fetch) for fetch in fetches]
+        self._store_data_update(data_sources, manifest, end_date, fetches, results)
+
+    async def aupdate_data(self, data_sources: list = None, incremental: bool = False):
+        """Updates the cache like update_data without blocking the event loop. The data sources are fetched
+        concurrently in the loop's default executor, after any update of the era data already in flight"""
+        await self._run_in_flight(self._DATA_TASK, lambda: self._aupdate_data(data_sources, incremental))
+
+    def update_daily_data(self, data_sources: list = None):
+        # if data sources are given only they are fetched and other columns keep their cached values
+        # sources that fail keep their last daily values, or the last era values if they have no daily values yet
+        manifest, fetches = self._plan_daily_update(data_sources)
+        results = [self._fetch_data(*fetch) for fetch in fetches]
+        self._store_daily_update(data_sources, manifest, fetches, results)
+
+    async def aupdate_daily_data(self, data_sources: list = None):
+        """Updates the daily cache like update_daily_data without blocking the event loop. The data sources are
+        fetched concurrently in the loop's default executor, after any update of the daily data already in flight"""
+        await self._run_in_flight(self._DAILY_TASK, lambda: self._aupdate_daily_data(data_sources))
+
+    def _plan_data_update(self, data_sources: list, incremental: bool) -> tuple:
+        """Returns the manifest to update, the last date to fetch and the (data source class, start date, end date)
+        of each fetch"""
+        manifest = self._get_manifest(self.data_cache, self.data_manifest)
+        if data_sources is None:
+            manifest = self._get_pruned_manifest(manifest)
+        first_date = date_utils.get_date_for_era(1)
+        end_date = date_utils.get_date_for_era(date_utils.get_current_era())
+        refetch_date = first_date
+        if incremental and not self.data_cache.empty:
+            refetch_date = date_utils.get_date_for_era(max(1, self._get_last_era() - self.INCREMENTAL_REFETCH_ERAS))
+
+        fetches = []
+        for data_source_class in data_sources or self._get_data_sources():
+            cached = self._is_source_cached(data_source_class, self.data_cache, manifest)
+            fetches.append((data_source_class, refetch_date if cached else first_date, end_date))
+        return manifest, end_date, fetches
+
+    def _store_data_update(self, data_sources: list, manifest: dict, end_date, fetches: list, results: list):
+        frames = []
+        refetched_columns = []
+        first_date = date_utils.get_date_for_era(1)
+
+        for (data_source_class, start_date, _), data in zip(fetches, results):
+            columns = self._get_columns(data_source_class)
+            if data is None:
+                # only columns that were never fetched are left empty
+                missing_columns = [column for column in columns if column not in self.data_cache.columns]
+                if not missing_columns:
+                    continue
+                data = pd.DataFrame({BaseDataSource.DATE_COL: pd.date_range(start_date, end_date)})
+                data[missing_columns] = None
+            else:
+                if start_date == first_date:
+                    refetched_columns += columns
+                manifest[data_source_class.__name__] = self._get_manifest_entry(data_source_class)
+
+            frames.append(data)
+
+        if not frames:
+            frames.append(pd.DataFrame({BaseDataSource.DATE_COL: pd.date_range(first_date, end_date)}))
+
+        cache = self._get_retained_cache(self.data_cache, data_sources, refetched_columns)
+        if self.engine == "polars":
+            data_frame = self._assemble_eras_polars(frames, cache)
+            self.data_cache = data_frame.to_pandas()
+            self._data_table = (self.data_cache, data_frame.to_arrow())
+        else:
+            self.data_cache = self._assemble_eras(frames, cache)
 
-    def update_daily_data(self):
+        # write cache to disk
+        self.data_manifest = manifest
+        self._write_data_cache()
+
+    def _plan_daily_update(self, data_sources: list) -> tuple:
+        """Returns the manifest to update and the (data source class, start date, end date) of each fetch"""
+        daily_cache = self.daily_cache if BaseDataSource.ERA_COL in self.daily_cache.columns else pd.DataFrame()
+        manifest = self._get_manifest(daily_cache, self.daily_manifest)
+        if data_sources is None:
+            manifest = self._get_pruned_manifest(manifest)
+        current_date = date_utils.get_current_date()
+
+        fetches = [
+            (data_source_class, current_date, current_date)
+            for data_source_class in data_sources or self._get_data_sources()
+        ]
+        return manifest, fetches
+
+    def _store_daily_update(self, data_sources: list, manifest: dict, fetches: list, results: list):
         new_data = pd.DataFrame()
-        start_date = date_utils.get_current_date()
-        end_date = date_utils.get_current_date()
-
-        for data_source_class in self._get_data_sources():
-            data_source = data_source_class()            
-            try:
-                data = data_source.get_data(start_date, end_date)
-            except Exception as e:
-                logging.exception(
-                    f"Error getting data from {data_source_class.__name__}: {e} on {start_date} to {end_date}"
-                )
-                # fill with the last era value
-                data = pd.DataFrame()
-                data[BaseDataSource.DATE_COL] = pd.date_range(start_date, end_date)
-                data[BaseDataSource.DATE_COL] = data[BaseDataSource.DATE_COL].dt.date
-                data[data_source.get_columns()] = self.data_cache[data_source.get_columns()].tail(1).values
+        refetched_columns = []
+        start_date = end_date = date_utils.get_current_date()
+        daily_cache = self.daily_cache if BaseDataSource.ERA_COL in self.daily_cache.columns else pd.DataFrame()
+
+        for (data_source_class, start_date, end_date), data in zip(fetches, results):
+            columns = self._get_columns(data_source_class)
+            if data is None:
+                missing_columns = [column for column in columns if column not in daily_cache.columns]
+                if not missing_columns:
+                    continue
+                data = pd.DataFrame({BaseDataSource.DATE_COL: pd.date_range(start_date, end_date)})
+                last_era = self.data_cache.tail(1)
+                for column in missing_columns:
+                    data[column] = last_era[column].iloc[0] if column in last_era.columns and len(last_era) else None
+            else:
+                refetched_columns += columns
+                manifest[data_source_class.__name__] = self._get_manifest_entry(data_source_class)
 
             new_data = data if new_data.empty else pd.merge(new_data, data, how="outer", on=BaseDataSource.DATE_COL)
 
+        if new_data.empty:
+            new_data = pd.DataFrame({BaseDataSource.DATE_COL: pd.date_range(start_date, end_date)})
+
+        # the daily frame is a single row, so keep its date as a plain date for comparisons and callers
+        new_data[BaseDataSource.DATE_COL] = new_data[BaseDataSource.DATE_COL].dt.date
+
         # add era column with X value so it can be merged with the live data
         new_data[BaseDataSource.ERA_COL] = "X"
+        cache = self._get_retained_cache(daily_cache, data_sources, refetched_columns)
+        if not cache.empty:
+            new_data = self._splice_cached(new_data, cache)
+            new_data = new_data[new_data.columns.drop(BaseDataSource.ERA_COL).tolist() + [BaseDataSource.ERA_COL]]
         self.daily_cache = new_data
-        self.daily_cache.to_parquet(self.DAILY_CACHE_FILE)
+        self.daily_manifest = manifest
+        self._write_daily_cache()
+
+    def _write_data_cache(self):
+        # the polars engine keeps the arrow table it built the cache from, so it is written without a conversion
+        table = self._data_table[1] if self._data_table[0] is self.data_cache else None
+        self._data_cache_key = self._write_cache_file(
+            self.DATA_CACHE_FILE, self.data_cache, self.data_manifest, table, self.PARQUET_WRITER_CONFIG
+        )
+
+    def _write_daily_cache(self):
+        self._daily_cache_key = self._write_cache_file(
+            self.DAILY_CACHE_FILE, self.daily_cache, self.daily_manifest, config=self.PARQUET_WRITER_CONFIG
+        )
+
+    def _migrate_data_schema(self) -> tuple:
+        """Drops the removed columns from the era data in memory and returns the outdated data sources and the
+        removed columns"""
+        outdated_sources, removed_columns = self._get_schema_changes(self.data_cache, self.data_manifest)
+        if removed_columns:
+            self.data_cache = self.data_cache.drop(columns=removed_columns)
+            self.data_manifest = self._get_pruned_manifest(self.data_manifest)
+        return outdated_sources, removed_columns
+
+    def _migrate_daily_schema(self) -> tuple:
+        """Drops the removed columns from the daily data in memory and returns the outdated data sources and the
+        removed columns"""
+        outdated_sources, removed_columns = self._get_schema_changes(self.daily_cache, self.daily_manifest)
+        if removed_columns:
+            self.daily_cache = self.daily_cache.drop(columns=removed_columns)
+            self.daily_manifest = self._get_pruned_manifest(self.daily_manifest)
+        return outdated_sources, removed_columns
+
+    def _is_data_update_needed(self) -> bool:
+        return self._is_data_cache_stale() or any(self._get_schema_changes(self.data_cache, self.data_manifest))
+
+    def _is_daily_update_needed(self) -> bool:
+        return self._is_daily_cache_stale() or any(self._get_schema_changes(self.daily_cache, self.daily_manifest))
+
+    async def _arefresh_data(self):
+        loop = asyncio.get_running_loop()
+        if self.server_url:
+            self.data_cache = await loop.run_in_executor(None, self._get_from_server, era_data_server.ERAS_PATH)
+            return
+
+        # same steps as get_all_eras
+        if self._is_data_cache_stale():
+            await self._aupdate_data(None, incremental=True)
+            return
+
+        outdated_sources, removed_columns = self._migrate_data_schema()
+        if outdated_sources:
+            await self._aupdate_data(outdated_sources, incremental=False)
+        elif removed_columns:
+            await loop.run_in_executor(None, self._write_data_cache)
+
+    async def _arefresh_daily(self):
+        loop = asyncio.get_running_loop()
+        if self.server_url:
+            self.daily_cache = await loop.run_in_executor(None, self._get_from_server, era_data_server.DAILY_PATH)
+            return
+
+        # same steps as get_current_daily
+        if self._is_daily_cache_stale():
+            await self._aupdate_daily_data(None)
+            return
+
+        outdated_sources, removed_columns = self._migrate_daily_schema()
+        if outdated_sources:
+            await self._aupdate_daily_data(outdated_sources)
+        elif removed_columns:
+            await loop.run_in_executor(None, self._write_daily_cache)
+
+    async def _aupdate_data(self, data_sources: list, incremental: bool):
+        loop = asyncio.get_running_loop()
+        manifest, end_date, fetches = self._plan_data_update(data_sources, incremental)
+        results = await self._afetch_data(fetches)
+        await loop.run_in_executor(None, self._store_data_update, data_sources, manifest, end_date, fetches, results)
+
+    async def _aupdate_daily_data(self, data_sources: list):
+        loop = asyncio.get_running_loop()
+        manifest, fetches = self._plan_daily_update(data_sources)
+        results = await self._afetch_data(fetches)
+        await loop.run_in_executor(None, self._store_daily_update, data_sources, manifest, fetches, results)
+
+    async def _afetch_data(self, fetches: list) -> list:
+        # data sources are blocking, so each fetch runs in its own executor thread
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*[loop.run_in_executor(None, self._fetch_data, *fetch) for fetch in fetches])
+
+    async def _run_in_flight(self, name: str, start, coalesce: bool = False):
+        """Runs start() as the in-flight task of name, after the task already in flight, or if coalesce is set
+        waits for the task already in flight instead. Cancelling a caller does not cancel the shared task"""
+        loop = asyncio.get_running_loop()
+        while True:
+            task = self._in_flight.get(name)
+            if task is None or task.done() or task.get_loop() is not loop:
+                break
+            if coalesce:
+                await asyncio.shield(task)
+                return
+            # the result of an earlier update belongs to its own callers
+            with contextlib.suppress(Exception):
+                await asyncio.shield(task)
+
+        task = loop.create_task(start())
+        self._in_flight[name] = task
+        task.add_done_callback(lambda done: self._in_flight.pop(name) if self._in_flight.get(name) is done else None)
+        await asyncio.shield(task)
+
+    def _fetch_data(self, data_source_class: type, start_date, end_date) -> pd.DataFrame:
+        """Returns the source data with a datetime date column, or None if the source failed or its circuit breaker
+        is open"""
+        circuit_breaker = self._get_circuit_breaker(data_source_class)
+        if not circuit_breaker.allow():
+            logging.error(f"Skipping {data_source_class.__name__}, circuit breaker is open")
+            return None
+
+        try:
+            data = data_source_class().get_data(start_date, end_date)
+        except Exception as e:
+            logging.exception(
+                f"Error getting data from {data_source_class.__name__}: {e} on {start_date} to {end_date}"
+            )
+            circuit_breaker.record_failure()
+            return None
+
+        circuit_breaker.record_success()
+        data[BaseDataSource.DATE_COL] = pd.to_datetime(data[BaseDataSource.DATE_COL])
+        return data
+
+    @classmethod
+    def _get_circuit_breaker(cls, data_source_class: type) -> CircuitBreaker:
+        with cls._circuit_breakers_lock:
+            return cls._circuit_breakers.setdefault(data_source_class, CircuitBreaker())
+
+    def _get_retained_cache(self, cache: pd.DataFrame, data_sources: list, refetched_columns: list) -> pd.DataFrame:
+        """Returns the cached columns to splice into new data, which are all cached columns except those refetched
+        in full. On a full update, columns that no data source provides anymore are dropped"""
+        if cache.empty:
+            return pd.DataFrame()
+
+        if data_sources is None:
+            keep = self._get_all_columns(tuple(self._get_data_sources()))
+        else:
+            keep = set(cache.columns)
+        columns = [
+            column for column in cache.columns
+            if column in keep and column not in refetched_columns
+            and column not in (BaseDataSource.ERA_COL, BaseDataSource.DATE_COL)
+        ]
+
+        return cache[[BaseDataSource.ERA_COL] + columns] if columns else pd.DataFrame()
+
+    @staticmethod
+    def _assemble_eras(frames: list, cache: pd.DataFrame) -> pd.DataFrame:
+        # merge daily source data, forward fill and keep the last day of each era
+        new_data = pd.DataFrame()
+        for data in frames:
+            new_data = data if new_data.empty else pd.merge(new_data, data, how="outer", on=BaseDataSource.DATE_COL)
+
+        eras = date_utils.get_eras_for_dates(new_data[BaseDataSource.DATE_COL].to_numpy())
+        new_data[BaseDataSource.ERA_COL] = pd.Series(eras, index=new_data.index).astype(str).str.zfill(4)
+        new_data = new_data.ffill()
+        new_data = new_data.drop_duplicates(subset=[BaseDataSource.ERA_COL], keep="last")
+        new_data = new_data.drop(columns=[BaseDataSource.DATE_COL])
+        if not cache.empty:
+            new_data = EraDataAPI._splice_cached(new_data, cache)
+        new_data = new_data.reindex(columns=[BaseDataSource.ERA_COL] 
+                                    + new_data.columns.difference([BaseDataSource.ERA_COL]).tolist())
+        return new_data.reset_index(drop=True)
+
+    @staticmethod
+    def _assemble_eras_polars(frames: list, cache: pd.DataFrame) -> "pl.DataFrame":
+        # same result as _assemble_eras, built as a single lazy polars query
+        import polars as pl
+
+        plan = None
+        for data in frames:
+            frame = pl.from_pandas(data).lazy()
+            plan = frame if plan is None else plan.join(frame, on=BaseDataSource.DATE_COL, how="full", coalesce=True)
+
+        era_one_start = pl.lit(datetime.combine(date_utils.ERA_ONE_START, time()))
+        era = (pl.col(BaseDataSource.DATE_COL) - era_one_start).dt.total_days()
+        plan = (
+            plan.sort(BaseDataSource.DATE_COL)
+            .with_columns((era // 7 + 1).cast(pl.Utf8).str.zfill(4).alias(BaseDataSource.ERA_COL))
+            .select(pl.all().forward_fill())
+            .unique(subset=[BaseDataSource.ERA_COL], keep="last", maintain_order=True)
+            .drop(BaseDataSource.DATE_COL)
+        )
+
+        if not cache.empty:
+            new_columns = {column for data in frames for column in data.columns}
+            overlap = [
+                column for column in cache.columns if column in new_columns and column != BaseDataSource.ERA_COL
+            ]
+            plan = (
+                pl.from_pandas(cache).lazy()
+                .join(plan, on=BaseDataSource.ERA_COL, how="full", coalesce=True, suffix="_new")
+                .with_columns([pl.coalesce(column + "_new", column).alias(column) for column in overlap])
+                .drop([column + "_new" for column in overlap])
+                .sort(BaseDataSource.ERA_COL)
+                .select(pl.all().forward_fill())
+            )
+
+        columns = plan.collect_schema().names()
+        columns = [BaseDataSource.ERA_COL] + sorted(column for column in columns if column != BaseDataSource.ERA_COL)
+        # the streaming engine is much slower at forward filling wide frames
+        return plan.select(columns).collect(engine="in-memory")
+
+    @staticmethod
+    def _splice_cached(new_data: pd.DataFrame, cache: pd.DataFrame) -> pd.DataFrame:
+        # fill the eras and columns missing from the new data with cached values, new values take precedence
+        # where both exist, and cached columns that were not fetched carry their last values forward to new eras
+        spliced = new_data.set_index(BaseDataSource.ERA_COL).combine_first(cache.set_index(BaseDataSource.ERA_COL))
+        spliced = spliced.sort_index().ffill().reset_index()
+        spliced = spliced[new_data.columns.tolist() + cache.columns.difference(new_data.columns, sort=False).tolist()]
+
+        # restore dtypes that the alignment widened, where forward filling left no gaps
+        dtypes = {column: cache[column].dtype for column in cache.columns}
+        dtypes.update({column: new_data[column].dtype for column in new_data.columns})
+        return spliced.astype(
+            {column: dtypes[column] for column in spliced.columns if not spliced[column].isna().any()}
+        )
+
+    def _get_schema_changes(self, cache: pd.DataFrame, manifest: dict) -> tuple:
+        """Returns the data sources that are not cached by their current version, including sources with added
+        columns, and the cached columns that no data source provides anymore"""
+        # memoized per cache frame and manifest, as they are replaced rather than modified
+        cached_cache, cached_manifest, changes = self._schema_changes.get(id(cache), (None, None, None))
+        if cached_cache is cache and cached_manifest is manifest:
+            return changes
+
+        changes = self._find_schema_changes(cache, manifest)
+        self._schema_changes = {
+            key: value for key, value in self._schema_changes.items()
+            if value[0] is self.data_cache or value[0] is self.daily_cache
+        }
+        self._schema_changes[id(cache)] = (cache, manifest, changes)
+        return changes
+
+    def _find_schema_changes(self, cache: pd.DataFrame, manifest: dict) -> tuple:
+        manifest = self._get_manifest(cache, manifest)
+        data_sources = self._get_data_sources()
+        outdated_sources = [
+            data_source_class for data_source_class in data_sources
+            if not self._is_source_cached(data_source_class, cache, manifest)
+        ]
+        all_columns = self._get_all_columns(tuple(data_sources))
+        removed_columns = [
+            column for column in cache.columns
+            if column not in all_columns and column not in (BaseDataSource.ERA_COL, BaseDataSource.DATE_COL)
+        ]
+        return outdated_sources, removed_columns
+
+    def _is_source_cached(self, data_source_class: type, cache: pd.DataFrame, manifest: dict) -> bool:
+        entry = manifest.get(data_source_class.__name__)
+        return (
+            entry is not None
+            and entry["version"] == self._get_version(data_source_class)
+            and set(self._get_columns(data_source_class)).issubset(cache.columns)
+        )
+
+    def _get_manifest(self, cache: pd.DataFrame, manifest: dict) -> dict:
+        """Returns a copy of the manifest of a cache. Caches written before manifests were stored are taken to be
+        current for the sources whose columns they contain, so upgrading does not refetch them"""
+        if manifest is not None:
+            return dict(manifest)
+        return {
+            data_source_class.__name__: self._get_manifest_entry(data_source_class)
+            for data_source_class in self._get_data_sources()
+            if set(self._get_columns(data_source_class)).issubset(cache.columns)
+        }
+
+    def _get_pruned_manifest(self, manifest: dict) -> dict:
+        # drop the entries of data sources that no longer exist
+        if manifest is None:
+            return None
+        names = {data_source_class.__name__ for data_source_class in self._get_data_sources()}
+        return {name: entry for name, entry in manifest.items() if name in names}
+
+    def _get_manifest_entry(self, data_source_class: type) -> dict:
+        return {"version": self._get_version(data_source_class), "columns": list(self._get_columns(data_source_class))}
+
+    @staticmethod
+    def _get_version(data_source_class: type) -> int:
+        return getattr(data_source_class, "VERSION", BaseDataSource.VERSION)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_columns(data_source_class: type) -> tuple:
+        # source columns are fixed per class, so each class is only instantiated once per process
+        return tuple(data_source_class().get_columns())
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def _get_all_columns(data_source_classes: tuple) -> frozenset:
+        return frozenset(
+            column
+            for data_source_class in data_source_classes
+            for column in EraDataAPI._get_columns(data_source_class)
+        )
+
+    @staticmethod
+    def _get_file_key(path: str) -> tuple:
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    @classmethod
+    def _read_cache_file(cls, path: str) -> tuple:
+        """Returns the file key, data and manifest of a parquet cache file, reading it only if it changed since it
+        was last read or written in this process"""
+        path = os.path.abspath(path)
+        with cls._file_cache_lock:
+            key = cls._get_file_key(path)
+            cached_key, data, manifest = cls._file_cache.get(path, (None, None, None))
+            if key is not None and key != cached_key:
+                table = pq.read_table(path)
+                data = table.to_pandas()
+                metadata = table.schema.metadata or {}
+                manifest = json.loads(metadata[cls.MANIFEST_KEY]) if cls.MANIFEST_KEY in metadata else None
+                cls._file_cache[path] = (key, data, manifest)
+            return key, data if data is not None else pd.DataFrame(), manifest
+
+    @classmethod
+    def _write_cache_file(
+        cls,
+        path: str,
+        data: pd.DataFrame,
+        manifest: dict,
+        table: pa.Table = None,
+        config: parquet_writer.ParquetWriterConfig = None,
+    ) -> tuple:
+        # write to a temporary file and rename it, so other processes never read a partially written file
+        path = os.path.abspath(path)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        if table is None:
+            table = pa.Table.from_pandas(data, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        if manifest is not None:
+            metadata[cls.MANIFEST_KEY] = json.dumps(manifest).encode()
+        config = config if config is not None else cls.PARQUET_WRITER_CONFIG
+        parquet_writer.write_table(table.replace_schema_metadata(metadata), temp_path, config)
+        with cls._file_cache_lock:
+            os.replace(temp_path, path)
+            key = cls._get_file_key(path)
+            cls._file_cache[path] = (key, data, manifest)
+        return key
+
+    def _sync_cache_files(self):
+        # pick up cache files written by other instances or processes, data set directly on the instance is kept
+        # until the file on disk changes
+        if self._is_cache_file_changed(self.DATA_CACHE_FILE, self._data_cache_key):
+            self._data_cache_key, self.data_cache, self.data_manifest = self._read_cache_file(self.DATA_CACHE_FILE)
+        if self._is_cache_file_changed(self.DAILY_CACHE_FILE, self._daily_cache_key):
+            self._daily_cache_key, self.daily_cache, self.daily_manifest = self._read_cache_file(
+                self.DAILY_CACHE_FILE
+            )
+
+    def _is_cache_file_changed(self, path: str, key: tuple) -> bool:
+        return self._get_file_key(path) not in (None, key)
+
+    def _get_last_era(self) -> int:
+        cached_data, last_era = self._last_era
+        if cached_data is not self.data_cache:
+            last_era = int(self.data_cache[BaseDataSource.ERA_COL].astype(int).max())
+            self._last_era = (self.data_cache, last_era)
+        return last_era
+
+    def _is_data_cache_stale(self) -> bool:
+        return self.data_cache.empty or self._get_last_era() < date_utils.get_current_era()
+
+    def _is_daily_cache_stale(self) -> bool:
+        return self.daily_cache.empty or self.daily_cache[BaseDataSource.DATE_COL][0] != date_utils.get_current_date()
+
+    def _get_from_server(self, path: str) -> pd.DataFrame:
+        response = requests.get(self.server_url.rstrip("/") + path, timeout=self.SERVER_TIMEOUT)
+        response.raise_for_status()
+        return era_data_server.from_arrow_ipc(response.content)
 
     def _get_data_sources(self) -> list:
         if len(self.class_cache) > 0:
             return self.class_cache
+        if EraDataAPI._discovered_data_sources is not None:
+            self.class_cache = EraDataAPI._discovered_data_sources
+            return self.class_cache
 
         full_subpackage_name = "numerai_era_data.data_sources"
         module = importlib.import_module(full_subpackage_name)
@@ -153,5 +781,6 @@ class EraDataAPI:
                 ):
                     classes.append(obj)
 
+        EraDataAPI._discovered_data_sources = classes
         self.class_cache = classes
         return classes
@@ -0,0 +1,120 @@
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+import pandas as pd
+import pyarrow as pa
+
+import numerai_era_data.date_utils as date_utils
+import numerai_era_data.era_data_api as era_data_api
+
+ARROW_STREAM_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+ERAS_PATH = "/eras"
+DAILY_PATH = "/daily"
+HEALTH_PATH = "/health"
+
+
+def to_arrow_ipc(data: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def from_arrow_ipc(payload: bytes) -> pd.DataFrame:
+    with pa.ipc.open_stream(payload) as reader:
+        return reader.read_all().to_pandas()
+
+
+class EraDataServer:
+    """Owns a single EraDataAPI cache and serves it to EraDataAPI clients over HTTP.
+
+    Refreshes are serialized so concurrent requests for stale data trigger one upstream update, and the
+    Arrow IPC payload is only rebuilt when the current era or date changes or the cache file is rewritten."""
+
+    def __init__(self, api: "era_data_api.EraDataAPI" = None):
+        # an empty server url keeps the served API in local mode even if the client environment variable is set
+        self.era_data_api = api if api is not None else era_data_api.EraDataAPI(server_url="")
+        self._lock = threading.Lock()
+        self._payloads = {}
+
+    def get_payload(self, path: str) -> bytes:
+        if path == ERAS_PATH:
+            getter = self.era_data_api.get_all_eras
+        elif path == DAILY_PATH:
+            getter = self.era_data_api.get_current_daily
+        else:
+            raise KeyError(path)
+
+        with self._lock:
+            cached_key, payload = self._payloads.get(path, (None, None))
+            if cached_key != self._get_payload_key(path):
+                payload = to_arrow_ipc(getter())
+                # the getter may have rewritten the cache file, so the key is taken after it
+                self._payloads[path] = (self._get_payload_key(path), payload)
+
+        return payload
+
+    def _get_payload_key(self, path: str) -> tuple:
+        # a refresh or schema migration rewrites the cache file within an era, so its file key is part of the key
+        if path == ERAS_PATH:
+            return date_utils.get_current_era(), self.era_data_api._get_file_key(self.era_data_api.DATA_CACHE_FILE)
+        return date_utils.get_current_date(), self.era_data_api._get_file_key(self.era_data_api.DAILY_CACHE_FILE)
+
+    def make_handler(self) -> type:
+        server = self
+
+        class EraDataRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = urlparse(self.path).path
+
+                if path == HEALTH_PATH:
+                    self._respond(200, "text/plain", b"ok")
+                    return
+
+                try:
+                    payload = server.get_payload(path)
+                except KeyError:
+                    self._respond(404, "text/plain", b"not found")
+                    return
+                except Exception as e:
+                    logging.exception(f"Error serving {path}: {e}")
+                    self._respond(500, "text/plain", str(e).encode())
+                    return
+
+                self._respond(200, ARROW_STREAM_CONTENT_TYPE, payload)
+
+            def log_message(self, format, *args):
+                logging.info(format, *args)
+
+            def _respond(self, status: int, content_type: str, body: bytes):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return EraDataRequestHandler
+
+    def make_http_server(self, host: str = "127.0.0.1", port: int = 8000) -> ThreadingHTTPServer:
+        return ThreadingHTTPServer((host, port), self.make_handler())
+
+    def serve_forever(self, host: str = "127.0.0.1", port: int = 8000):
+        with self.make_http_server(host, port) as http_server:
+            http_server.serve_forever()
+
+
+def main(argv: list = None):
+    parser = argparse.ArgumentParser(description="Serve cached Numerai era data to EraDataAPI clients")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args(argv)
+
+    EraDataServer().serve_forever(args.host, args.port)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    main()
@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+
+DISTANCE_COL = "distance"
+CLUSTER_COL = "cluster"
+
+
+def get_feature_columns(data: pd.DataFrame) -> list:
+    """Returns the era feature columns that are comparable across eras, which excludes raw columns"""
+    return [
+        column for column in data.columns
+        if column.startswith(BaseDataSource._BASE_PREFIX) and not column.startswith(BaseDataSource._BASE_PREFIX_RAW)
+    ]
+
+
+class EraSimilarityIndex:
+    """Nearest-neighbour index of eras by their standardized features.
+
+    Features are standardized with the means and standard deviations of the eras the index is built from, and
+    missing values are treated as the mean. Queries are answered by vectorized brute force, or by a ball tree
+    (requires scikit-learn) if tree is set. Eras added later are kept in a brute-force buffer next to the tree and
+    reuse the original standardization, so adding eras never rebuilds the index."""
+
+    def __init__(self, data: pd.DataFrame, columns: list = None, tree: bool = False, leaf_size: int = 40):
+        self.columns = columns if columns is not None else get_feature_columns(data)
+        values = data[self.columns].to_numpy(dtype="float64", na_value=np.nan)
+        self.means = np.nan_to_num(np.nanmean(values, axis=0)) if len(values) else np.zeros(len(self.columns))
+        stds = np.nanstd(values, axis=0) if len(values) else np.ones(len(self.columns))
+        self.stds = np.where(np.isfinite(stds) & (stds > 0), stds, 1.0)
+
+        self._eras = []
+        self._positions = {}
+        self._features = np.empty((0, len(self.columns)))
+        self._squared_norms = np.empty(0)
+        self._active = np.empty(0, dtype=bool)
+        self._tree = None
+        self._tree_size = 0
+
+        self.add(data)
+
+        if tree and len(self._eras) > 0:
+            try:
+                from sklearn.neighbors import BallTree
+            except ImportError as e:
+                raise ImportError("The ball tree requires scikit-learn, install numerai-era-data[similarity]") from e
+            self._tree = BallTree(self._features[:len(self._eras)], leaf_size=leaf_size)
+            self._tree_size = len(self._eras)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    @property
+    def eras(self) -> list:
+        return sorted(self._positions)
+
+    def add(self, data: pd.DataFrame):
+        """Adds eras to the index, eras that are already indexed are replaced"""
+        features = self.standardize(data)
+        size = len(self._eras)
+        if size + len(features) > len(self._features):
+            # grow geometrically so repeated adds copy the features a logarithmic number of times
+            capacity = max(2 * len(self._features), size + len(features), 64)
+            self._features = np.resize(self._features, (capacity, len(self.columns)))
+            self._squared_norms = np.resize(self._squared_norms, capacity)
+            self._active = np.resize(self._active, capacity)
+
+        for era, row in zip(data[BaseDataSource.ERA_COL], features):
+            position = self._positions.get(era)
+            if position is None or position < self._tree_size:
+                # rows in the tree cannot change, so a replaced tree row is masked and the era moves to the buffer
+                if position is not None:
+                    self._active[position] = False
+                position = len(self._eras)
+                self._eras.append(era)
+                self._positions[era] = position
+            self._features[position] = row
+            self._squared_norms[position] = row @ row
+            self._active[position] = True
+
+    def standardize(self, data: pd.DataFrame) -> np.ndarray:
+        values = data[self.columns].to_numpy(dtype="float64", na_value=np.nan)
+        return np.nan_to_num((values - self.means) / self.stds)
+
+    def query(self, data: pd.DataFrame, k: int = 10) -> pd.DataFrame:
+        """Returns the k eras most similar to the first row of data (e.g. the current daily row), closest first"""
+        row = self.standardize(data.iloc[:1])[0]
+        k = min(k, len(self))
+
+        candidates = []
+        distances = []
+        buffer_start = 0
+        if self._tree is not None:
+            # masked tree rows may be among the nearest, so ask for enough extra neighbours to skip them
+            masked = self._tree_size - np.count_nonzero(self._active[:self._tree_size])
+            tree_distances, tree_positions = self._tree.query(
+                row[np.newaxis], k=min(k + masked, self._tree_size)
+            )
+            active = self._active[tree_positions[0]]
+            candidates.append(tree_positions[0][active])
+            distances.append(tree_distances[0][active])
+            buffer_start = self._tree_size
+
+        positions, buffer_distances = self._query_brute_force(row, k, buffer_start)
+        candidates.append(positions)
+        distances.append(buffer_distances)
+
+        positions = np.concatenate(candidates)
+        distances = np.concatenate(distances)
+        order = np.argsort(distances, kind="stable")[:k]
+        return pd.DataFrame({
+            BaseDataSource.ERA_COL: [self._eras[position] for position in positions[order]],
+            DISTANCE_COL: distances[order],
+        })
+
+    def cluster(self, n_clusters: int, iterations: int = 100, seed: int = 0) -> pd.DataFrame:
+        """Assigns the indexed eras to n_clusters regimes with k-means on the standardized features"""
+        positions = np.flatnonzero(self._active[:len(self._eras)])
+        features = self._features[positions]
+        rng = np.random.default_rng(seed)
+
+        # k-means++ initialization
+        centers = features[[rng.integers(len(features))]]
+        for _ in range(1, n_clusters):
+            squared_distances = self._get_squared_distances(features, centers).min(axis=1)
+            probabilities = squared_distances / squared_distances.sum() if squared_distances.sum() > 0 else None
+            centers = np.vstack([centers, features[rng.choice(len(features), p=probabilities)]])
+
+        labels = None
+        for _ in range(iterations):
+            new_labels = self._get_squared_distances(features, centers).argmin(axis=1)
+            if labels is not None and np.array_equal(new_labels, labels):
+                break
+            labels = new_labels
+            for i in range(n_clusters):
+                if (labels == i).any():
+                    centers[i] = features[labels == i].mean(axis=0)
+
+        clusters = pd.DataFrame({
+            BaseDataSource.ERA_COL: [self._eras[position] for position in positions],
+            CLUSTER_COL: labels,
+        })
+        return clusters.sort_values(BaseDataSource.ERA_COL, ignore_index=True)
+
+    def _query_brute_force(self, row: np.ndarray, k: int, start: int) -> tuple:
+        end = len(self._eras)
+        # |x - q|^2 = |x|^2 - 2 x.q + |q|^2 with precomputed norms is a single matrix-vector product
+        squared_distances = self._squared_norms[start:end] - 2 * (self._features[start:end] @ row) + row @ row
+        squared_distances[~self._active[start:end]] = np.inf
+        if k < len(squared_distances):
+            positions = np.argpartition(squared_distances, k)[:k]
+        else:
+            positions = np.arange(len(squared_distances))
+        positions = positions[np.isfinite(squared_distances[positions])]
+        return positions + start, np.sqrt(np.maximum(squared_distances[positions], 0))
+
+    @staticmethod
+    def _get_squared_distances(features: np.ndarray, centers: np.ndarray) -> np.ndarray:
+        return (
+            (features ** 2).sum(axis=1)[:, np.newaxis]
+            - 2 * features @ centers.T
+            + (centers ** 2).sum(axis=1)[np.newaxis]
+        )
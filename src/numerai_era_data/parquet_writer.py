@@ -0,0 +1,71 @@
+from typing import NamedTuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# only depends on pyarrow and numpy, so the command line tools can write parquet without importing pandas
+
+# matches BaseDataSource.ERA_COL
+ERA_COL = "era"
+
+
+class ParquetWriterConfig(NamedTuple):
+    # rows per row group, None writes the era data cache (one row per era) as a single group, which reads fastest
+    # at its size, smaller groups let era range scans skip whole groups of larger tables
+    row_group_size: int = None
+    # snappy decodes faster than zstd, and byte-stream-split already makes up most of the size difference
+    compression: str = "snappy"
+    # None uses the default level of the codec
+    compression_level: int = None
+    # float columns whose values change between at least this fraction of consecutive rows are written with
+    # byte-stream-split encoding, the others (e.g. forward-filled monthly series) compress better with dictionary
+    # encoding, None keeps dictionary encoding for every column
+    byte_stream_split_threshold: float = 0.5
+    # rows are sorted by this column and the file records the sort order, None keeps the row order
+    sort_column: str = ERA_COL
+
+
+DEFAULT_CONFIG = ParquetWriterConfig()
+
+
+def write_table(table: pa.Table, where, config: ParquetWriterConfig = DEFAULT_CONFIG):
+    """Writes a table to a parquet file or writable file object with the settings of config"""
+    sorting_columns = None
+    if config.sort_column is not None and config.sort_column in table.column_names:
+        if not _is_sorted(table.column(config.sort_column)):
+            table = table.sort_by(config.sort_column)
+        sorting_columns = [pq.SortingColumn(table.column_names.index(config.sort_column))]
+
+    byte_stream_split_columns = _get_byte_stream_split_columns(table, config.byte_stream_split_threshold)
+    pq.write_table(
+        table,
+        where,
+        row_group_size=config.row_group_size,
+        compression=config.compression,
+        compression_level=config.compression_level,
+        use_dictionary=[column for column in table.column_names if column not in byte_stream_split_columns],
+        column_encoding={column: "BYTE_STREAM_SPLIT" for column in byte_stream_split_columns} or None,
+        sorting_columns=sorting_columns,
+    )
+
+
+def _is_sorted(column: pa.ChunkedArray) -> bool:
+    values = column.to_numpy(zero_copy_only=False)
+    return bool(np.all(values[1:] >= values[:-1])) if len(values) > 1 else True
+
+
+def _get_byte_stream_split_columns(table: pa.Table, threshold: float) -> list:
+    if threshold is None or table.num_rows < 2:
+        return []
+
+    columns = []
+    for field, column in zip(table.schema, table.columns):
+        # byte-stream-split is only defined for 32 and 64 bit floats
+        if not (pa.types.is_float32(field.type) or pa.types.is_float64(field.type)):
+            continue
+        values = column.to_numpy()
+        changes = (values[1:] != values[:-1]) & ~(np.isnan(values[1:]) & np.isnan(values[:-1]))
+        if np.count_nonzero(changes) >= threshold * (len(values) - 1):
+            columns.append(field.name)
+    return columns
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+from multiprocessing import resource_tracker, shared_memory
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+
+
+class SharedEraDataDescriptor(NamedTuple):
+    # shared memory block name, or the .npy file path for memory-mapped data
+    name: str
+    memmap: bool
+    shape: tuple
+    dtype: str
+    eras: list
+    columns: list
+
+
+class SharedEraData:
+    """Publishes the numeric feature block of an era data frame for worker processes.
+
+    The owner copies the features once into shared memory (or a memory-mapped .npy file if a path is given) and
+    passes the small, picklable descriptor to workers, which attach to it without copying or reading parquet.
+    The owner must stay alive while workers use the data and closes it when done, unlinking the shared memory."""
+
+    def __init__(self, data: pd.DataFrame, path: str = None, dtype: str = "float64"):
+        columns = data.columns.drop(BaseDataSource.ERA_COL).tolist()
+        shape = (len(data), len(columns))
+        self._shared_memory = None
+
+        if path is not None:
+            values = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+            name = path
+        else:
+            # shared memory blocks cannot be empty
+            size = max(1, int(np.prod(shape)) * np.dtype(dtype).itemsize)
+            self._shared_memory = shared_memory.SharedMemory(create=True, size=size)
+            values = np.ndarray(shape, dtype=dtype, buffer=self._shared_memory.buf)
+            name = self._shared_memory.name
+
+        values[:] = data[columns].to_numpy(dtype=dtype, na_value=np.nan)
+        if path is not None:
+            values.flush()
+        del values
+
+        self.descriptor = SharedEraDataDescriptor(
+            name, path is not None, shape, dtype, data[BaseDataSource.ERA_COL].tolist(), columns
+        )
+
+    def close(self):
+        # a later publish may reuse the .npy path, so this process must not keep serving the old mapping
+        for key in [key for key in _attached if key[0] == self.descriptor.name]:
+            _attached.pop(key)
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+# blocks attached by this process, kept open for the lifetime of the process so attached frames stay valid
+_attached = {}
+_register_lock = threading.Lock()
+
+
+def attach(descriptor: SharedEraDataDescriptor) -> pd.DataFrame:
+    """Returns a read-only era data frame backed by the published block, attaching at most once per process"""
+    key = _get_key(descriptor)
+    if key not in _attached:
+        if descriptor.memmap:
+            values = np.load(descriptor.name, mmap_mode="r")
+            block = None
+        else:
+            block = _open_shared_memory(descriptor.name)
+            values = np.ndarray(descriptor.shape, dtype=descriptor.dtype, buffer=block.buf)
+            values.flags.writeable = False
+        _attached[key] = (block, values)
+
+    _, values = _attached[key]
+    data = pd.DataFrame(values, columns=descriptor.columns, copy=False)
+    data.insert(0, BaseDataSource.ERA_COL, descriptor.eras)
+    return data
+
+
+def detach(descriptor: SharedEraDataDescriptor):
+    """Releases this process's view of the block, frames returned by attach must not be used afterwards"""
+    block, values = _attached.pop(_get_key(descriptor), (None, None))
+    del values
+    if block is not None:
+        block.close()
+
+
+def _get_key(descriptor: SharedEraDataDescriptor) -> tuple:
+    # a .npy path can be republished with the same or another shape, so its mapping is also keyed by the file
+    key = (descriptor.name, tuple(descriptor.shape), descriptor.dtype)
+    if descriptor.memmap:
+        stat = os.stat(descriptor.name)
+        key += (stat.st_ino, stat.st_mtime_ns)
+    return key
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    # the publishing process owns the block, so attaching must not register it with a resource tracker that would
+    # unlink it when a worker exits
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    with _register_lock:
+        register = resource_tracker.register
+        resource_tracker.register = lambda name, rtype: None
+        try:
+            return shared_memory.SharedMemory(name=name)
+        finally:
+            resource_tracker.register = register
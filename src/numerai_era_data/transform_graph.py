@@ -0,0 +1,125 @@
+import contextlib
+import glob
+import hashlib
+import inspect
+import os
+import threading
+
+import pandas as pd
+
+
+class TransformGraph:
+    """Graph of raw series and derived features.
+
+    Source nodes hold fetched data and are hashed by content. Transform nodes are hashed from their function,
+    parameters and input hashes, and their results are memoized on disk, so only nodes whose inputs or definition
+    changed are recomputed. Nodes from any data source can be inputs, which allows cross-source features.
+
+    Nodes are keyed by name, so a caller that fetches in parallel with others holds lock from adding its nodes
+    until it has got their results."""
+
+    def __init__(self, cache_directory: str = None):
+        # without a cache directory results are only memoized in memory
+        self.cache_directory = cache_directory
+        self._sources = {}
+        self._transforms = {}
+        self._results = {}
+        self.lock = threading.RLock()
+
+    def add_source(self, name: str, data: pd.DataFrame):
+        self._transforms.pop(name, None)
+        self._sources[name] = (self._hash_data(data), data)
+
+    def add_transform(self, name: str, func, inputs: list, params: dict = None, dependencies: list = None):
+        """func is called with the input node results as positional arguments and params as keyword arguments and
+        must return a dataframe. dependencies are the functions or modules func calls, whose source is hashed with
+        func so that changing them recomputes the node"""
+        self._sources.pop(name, None)
+        self._transforms[name] = (func, list(inputs), params or {}, list(dependencies or []))
+
+    def get(self, name: str) -> pd.DataFrame:
+        with self.lock:
+            return self._get(name)
+
+    def _get(self, name: str) -> pd.DataFrame:
+        if name in self._sources:
+            return self._sources[name][1]
+
+        node_hash = self.get_hash(name)
+        cached_hash, result = self._results.get(name, (None, None))
+        if cached_hash == node_hash:
+            return result
+
+        cache_file = self._get_cache_file(name, node_hash)
+        result = self._read_cache_file(cache_file) if cache_file is not None else None
+        if result is None:
+            func, inputs, params, _ = self._transforms[name]
+            result = func(*[self._get(input_name) for input_name in inputs], **params)
+            if cache_file is not None:
+                self._write_cache_file(name, cache_file, result)
+
+        self._results[name] = (node_hash, result)
+        return result
+
+    def get_hash(self, name: str) -> str:
+        if name in self._sources:
+            return self._sources[name][0]
+
+        func, inputs, params, dependencies = self._transforms[name]
+
+        node_hash = hashlib.sha256()
+        node_hash.update(name.encode())
+        for code in [func] + dependencies:
+            node_hash.update(self._get_source(code).encode())
+        node_hash.update(repr(sorted(params.items())).encode())
+        for input_name in inputs:
+            node_hash.update(self.get_hash(input_name).encode())
+
+        return node_hash.hexdigest()
+
+    def clear_cache(self):
+        self._results = {}
+        if self.cache_directory is not None:
+            for cache_file in glob.glob(os.path.join(self.cache_directory, "*.parquet")):
+                os.remove(cache_file)
+
+    @staticmethod
+    def _get_source(code) -> str:
+        try:
+            return inspect.getsource(code)
+        except (OSError, TypeError):
+            return getattr(code, "__qualname__", repr(code))
+
+    @staticmethod
+    def _hash_data(data: pd.DataFrame) -> str:
+        data_hash = hashlib.sha256()
+        data_hash.update(repr(list(data.columns)).encode())
+        data_hash.update(pd.util.hash_pandas_object(data, index=True).values.tobytes())
+        return data_hash.hexdigest()
+
+    def _get_cache_file(self, name: str, node_hash: str) -> str:
+        if self.cache_directory is None:
+            return None
+        return os.path.join(self.cache_directory, f"{name}-{node_hash}.parquet")
+
+    @staticmethod
+    def _read_cache_file(cache_file: str) -> pd.DataFrame:
+        # another process may replace the latest result of the node at any time
+        try:
+            return pd.read_parquet(cache_file)
+        except FileNotFoundError:
+            return None
+
+    def _write_cache_file(self, name: str, cache_file: str, result: pd.DataFrame):
+        os.makedirs(self.cache_directory, exist_ok=True)
+
+        # write to a temporary file and rename it, so other processes never read a partially written file
+        temp_file = f"{cache_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        result.to_parquet(temp_file)
+        os.replace(temp_file, cache_file)
+
+        # only the latest result of each node is kept
+        for stale_file in glob.glob(os.path.join(self.cache_directory, f"{glob.escape(name)}-*.parquet")):
+            if stale_file != cache_file:
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(stale_file)
@@ -0,0 +1,89 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Trailing window statistics of 2d blocks with one column per series and one row per native period (e.g. month).
+# Every column is computed at once, a window containing a missing value yields a missing value, and the first
+# window - 1 rows are missing.
+
+
+def rolling_zscore(values: np.ndarray, window: int) -> np.ndarray:
+    """Returns how many sample standard deviations each value is from the mean of its window"""
+    # shifting by the column means limits cancellation in the cumulative sums of squares
+    valid = ~np.isnan(values)
+    counts = valid.sum(axis=0)
+    shift = np.where(counts > 0, np.where(valid, values, 0.0).sum(axis=0) / np.maximum(counts, 1), 0.0)
+    shifted = np.where(valid, values - shift, 0.0)
+
+    result = np.full(values.shape, np.nan)
+    if window < 2 or len(values) < window:
+        return result
+
+    count = _window_sum(valid.astype("float64"), window)
+    total = _window_sum(shifted, window)
+    squares = _window_sum(shifted**2, window)
+    mean = total / window
+    variance = (squares - total * mean) / (window - 1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zscore = (shifted[window - 1:] - mean) / np.sqrt(variance)
+    # constant windows have no meaningful z-score
+    constant = variance <= 1e-12 * np.maximum(squares / window, np.finfo("float64").tiny)
+    zscore[(count < window) | constant] = np.nan
+    result[window - 1:] = zscore
+    return result
+
+
+def rolling_rank(values: np.ndarray, window: int) -> np.ndarray:
+    """Returns the fraction of values in each window that are less than or equal to the latest value"""
+    result = np.full(values.shape, np.nan)
+    if len(values) < window:
+        return result
+
+    # strided view of every window without copying, shaped (rows, columns, window)
+    windows = sliding_window_view(values, window, axis=0)
+    rank = (windows <= windows[..., -1:]).sum(axis=-1) / window
+    rank[np.isnan(windows).any(axis=-1)] = np.nan
+    result[window - 1:] = rank
+    return result
+
+
+def rolling_slope(values: np.ndarray, window: int) -> np.ndarray:
+    """Returns the least squares slope per period of each window"""
+    return _rolling_polynomial_fit(values, window, 1)[..., 1]
+
+
+def rolling_acceleration(values: np.ndarray, window: int) -> np.ndarray:
+    """Returns the second derivative per period of a least squares quadratic fit of each window"""
+    if window < 3:
+        raise ValueError("Acceleration needs a window of at least 3 periods")
+    return 2 * _rolling_polynomial_fit(values, window, 2)[..., 2]
+
+
+def _rolling_polynomial_fit(values: np.ndarray, window: int, degree: int) -> np.ndarray:
+    # the design matrix only depends on the window length, so the least squares fit of every window is a single
+    # product of the strided windows with its pseudo-inverse
+    result = np.full(values.shape + (degree + 1,), np.nan)
+    if len(values) < window:
+        return result
+
+    periods = np.arange(window, dtype="float64") - (window - 1)
+    projection = np.linalg.pinv(np.vander(periods, degree + 1, increasing=True))
+    windows = sliding_window_view(values, window, axis=0)
+    result[window - 1:] = windows @ projection.T
+    return result
+
+
+def _window_sum(values: np.ndarray, window: int) -> np.ndarray:
+    # sums of rows window - 1 onwards from differences of cumulative sums
+    cumulative = np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+    return cumulative[window:] - cumulative[:-window]
+
+
+FEATURES = {
+    "zscore": rolling_zscore,
+    "rank": rolling_rank,
+    "slope": rolling_slope,
+    "acceleration": rolling_acceleration,
+}
+# features that do not depend on the scale of the series, so they are comparable across eras
+SCALE_FREE_FEATURES = ["zscore", "rank"]
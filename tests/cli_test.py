@@ -0,0 +1,148 @@
+import subprocess
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from mock import MagicMock, patch
+
+from numerai_era_data import cli
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+from numerai_era_data.era_data_api import EraDataAPI
+
+
+class DataSourceMock(BaseDataSource):
+    def get_data(self, start_date, end_date):
+        return pd.DataFrame()
+
+    def get_columns(self):
+        return []
+
+
+@pytest.fixture
+def cache_files(tmp_path):
+    data_cache_file = str(tmp_path / "data.parquet")
+    daily_cache_file = str(tmp_path / "daily.parquet")
+    pd.DataFrame({
+        BaseDataSource.ERA_COL: ["0001", "0002", "0003"],
+        "column1": [1.0, 2.0, 3.0],
+        "column2": [4.0, 5.0, 6.0],
+    }).to_parquet(data_cache_file)
+
+    with patch.object(cli, "DATA_CACHE_FILE", data_cache_file), \
+            patch.object(cli, "DAILY_CACHE_FILE", daily_cache_file):
+        yield tmp_path
+
+
+def test_cache_directory_matches_api():
+    assert cli.CACHE_DIRECTORY == EraDataAPI.CACHE_DIRECTORY
+    assert cli.DATA_CACHE_FILE == EraDataAPI.DATA_CACHE_FILE
+    assert cli.DAILY_CACHE_FILE == EraDataAPI.DAILY_CACHE_FILE
+    assert cli.MANIFEST_KEY == EraDataAPI.MANIFEST_KEY
+
+
+def test_import_is_lightweight():
+    code = "import sys, numerai_era_data.cli; print('pandas' in sys.modules or 'yfinance' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+    assert result.stdout.strip() == "False"
+
+
+def test_parse_eras():
+    assert cli._parse_eras(["1", "0005", "10-12", "X"]) == ["0001", "0005", "0010", "0011", "0012", "X"]
+
+
+def test_select_data_sources():
+    assert cli._select_data_sources([DataSourceMock], ["datasourcemock"]) == [DataSourceMock]
+
+    with pytest.raises(SystemExit):
+        cli._select_data_sources([DataSourceMock], ["unknown"])
+
+
+def test_stats(cache_files, capsys):
+    cli.main(["stats"])
+
+    output = capsys.readouterr().out
+    assert "rows: 3" in output
+    assert "eras: 0001 to 0003" in output
+    assert "daily data: missing" in output
+
+
+def test_stats_manifest(cache_files, capsys):
+    data = pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column1": [1.0]})
+    manifest = {"DataSourceMock": {"version": 2, "columns": ["column1"]}}
+    EraDataAPI._write_cache_file(cli.DATA_CACHE_FILE, data, manifest)
+
+    cli.main(["stats"])
+
+    assert "DataSourceMock: version 2, 1 columns" in capsys.readouterr().out
+
+
+def test_export_parquet(cache_files):
+    output = str(cache_files / "export.parquet")
+
+    cli.main(["export", "--columns", "column2", "--eras", "2-3", "--output", output])
+
+    data = pd.read_parquet(output)
+    assert data.columns.tolist() == [BaseDataSource.ERA_COL, "column2"]
+    assert data[BaseDataSource.ERA_COL].tolist() == ["0002", "0003"]
+
+
+def test_export_arrow(cache_files):
+    output = str(cache_files / "export.arrow")
+
+    cli.main(["export", "--format", "arrow", "--eras", "1", "--output", output])
+
+    with pa.memory_map(output) as source:
+        table = pa.ipc.open_file(source).read_all()
+    assert table.column_names == [BaseDataSource.ERA_COL, "column1", "column2"]
+    assert table.num_rows == 1
+
+
+def test_export_csv(cache_files):
+    output = str(cache_files / "export.csv")
+
+    cli.main(["export", "--format", "csv", "--columns", "column1", "--output", output])
+
+    assert pd.read_csv(output, dtype={BaseDataSource.ERA_COL: str})[BaseDataSource.ERA_COL].tolist() == [
+        "0001", "0002", "0003"
+    ]
+
+
+def test_export_missing_cache(cache_files):
+    with pytest.raises(SystemExit):
+        cli.main(["export", "--daily"])
+
+
+def test_refresh():
+    era_data_api = MagicMock()
+    era_data_api._get_data_sources.return_value = [DataSourceMock]
+
+    with patch("numerai_era_data.era_data_api.EraDataAPI", return_value=era_data_api):
+        cli.main(["refresh", "--sources", "DataSourceMock"])
+
+    era_data_api.update_data.assert_called_once_with([DataSourceMock])
+    era_data_api.update_daily_data.assert_called_once_with([DataSourceMock])
+
+
+def test_refresh_incremental_sources():
+    era_data_api = MagicMock()
+    era_data_api._get_data_sources.return_value = [DataSourceMock]
+
+    with patch("numerai_era_data.era_data_api.EraDataAPI", return_value=era_data_api):
+        cli.main(["refresh", "--sources", "DataSourceMock", "--incremental"])
+
+    era_data_api.update_data.assert_called_once_with([DataSourceMock], incremental=True)
+    era_data_api.update_daily_data.assert_called_once_with([DataSourceMock])
+    era_data_api.get_all_eras.assert_not_called()
+
+
+def test_refresh_incremental():
+    era_data_api = MagicMock()
+
+    with patch("numerai_era_data.era_data_api.EraDataAPI", return_value=era_data_api):
+        cli.main(["refresh", "--incremental"])
+
+    era_data_api.get_all_eras.assert_called_once()
+    era_data_api.get_current_daily.assert_called_once()
+    era_data_api.update_data.assert_not_called()
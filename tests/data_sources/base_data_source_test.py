@@ -0,0 +1,74 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+
+
+class MockDataSource(BaseDataSource):
+    def get_data(self, start_date, end_date):
+        return pd.DataFrame()
+
+    def get_columns(self):
+        return []
+
+
+def test_align_daily_matches_merge_ffill():
+    observations = pd.DataFrame({
+        BaseDataSource.DATE_COL: pd.to_datetime(["2012-01-01", "2012-01-04", "2012-01-06"]),
+        "column1": [1.0, np.nan, 3.0],
+        "column2": [10.0, 20.0, 30.0],
+    })
+    date_df = pd.DataFrame({BaseDataSource.DATE_COL: pd.date_range(date(2012, 1, 1), date(2012, 1, 8))})
+    expected = pd.merge(date_df, observations, on=BaseDataSource.DATE_COL, how="left").ffill()
+
+    data = MockDataSource()._align_daily(observations, date(2012, 1, 1), date(2012, 1, 8))
+
+    pd.testing.assert_frame_equal(data, expected)
+
+
+def test_align_daily_lags():
+    observations = pd.DataFrame({
+        BaseDataSource.DATE_COL: pd.to_datetime(["2012-01-01", "2012-01-03"]),
+        "column1": [1.0, 2.0],
+        "column2": [10.0, 20.0],
+    })
+
+    data = MockDataSource()._align_daily(observations, date(2012, 1, 1), date(2012, 1, 5), {"column2": 2})
+
+    assert data["column1"].tolist() == [1.0, 1.0, 2.0, 2.0, 2.0]
+    assert data["column2"].iloc[:2].isna().all()
+    assert data["column2"].tolist()[2:] == [10.0, 10.0, 20.0]
+
+
+def test_align_daily_unsorted_observations_before_start():
+    observations = pd.DataFrame({
+        BaseDataSource.DATE_COL: pd.to_datetime(["2012-01-03", "2011-06-01"]),
+        "column1": [2.0, 1.0],
+    })
+
+    data = MockDataSource()._align_daily(observations, date(2012, 1, 1), date(2012, 1, 3))
+
+    assert data[BaseDataSource.DATE_COL].tolist() == list(pd.date_range(date(2012, 1, 1), date(2012, 1, 3)))
+    assert data["column1"].tolist() == [1.0, 1.0, 2.0]
+    assert data[BaseDataSource.DATE_COL].dtype == np.dtype("datetime64[ns]")
+
+
+def test_get_window_features_joins_series():
+    monthly = pd.date_range("2010-01-01", periods=24, freq="MS")
+    observations1 = pd.DataFrame({BaseDataSource._BASE_PREFIX_RAW + "level": np.arange(24.0)}, index=monthly)
+    observations2 = pd.DataFrame({BaseDataSource._BASE_PREFIX + "rate": np.arange(23.0) ** 2}, index=monthly[1:])
+
+    data = BaseDataSource._get_window_features(observations1, observations2, windows=[3, 12])
+
+    assert data.index.equals(monthly)
+    assert data.columns.tolist() == (
+        BaseDataSource._get_window_feature_columns(BaseDataSource._BASE_PREFIX_RAW + "level", [3, 12])
+        + BaseDataSource._get_window_feature_columns(BaseDataSource._BASE_PREFIX + "rate", [3, 12])
+    )
+    assert data[BaseDataSource._BASE_PREFIX_RAW + "level_slope3"].iloc[2:].tolist() == pytest.approx([1.0] * 22)
+    assert data[BaseDataSource._BASE_PREFIX + "level_rank12"].iloc[11:].tolist() == [1.0] * 13
+    assert data[BaseDataSource._BASE_PREFIX + "rate_acceleration3"].iloc[3:].tolist() == pytest.approx([2.0] * 21)
+    assert data[BaseDataSource._BASE_PREFIX + "rate_zscore3"].iloc[:3].isna().all()
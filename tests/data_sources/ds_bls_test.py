@@ -1,20 +1,24 @@
 from datetime import date, datetime
 
+import pandas as pd
+import pytest
 import pytz
+from mock import MagicMock, patch
 
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
-from numerai_era_data.data_sources.ds_bls import DataSourceBLS
+from numerai_era_data.data_sources.ds_bls import BLSSeries, DataSourceBLS
+from numerai_era_data.transform_graph import TransformGraph
 
 
 def test_get_data():
     ds_bls = DataSourceBLS()
     ds_data = ds_bls.get_data(date(2012, 1, 1), date(2022, 1, 1))
     
-    assert ds_data.iloc[0][BaseDataSource.DATE_COL] == date(2012, 1, 1)
-    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == date(2022, 1, 1)
-    assert round(ds_data.loc[ds_data[BaseDataSource.DATE_COL] == date(2012, 2, 17)] \
+    assert ds_data.iloc[0][BaseDataSource.DATE_COL] == pd.Timestamp(2012, 1, 1)
+    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == pd.Timestamp(2022, 1, 1)
+    assert round(ds_data.loc[ds_data[BaseDataSource.DATE_COL] == pd.Timestamp(2012, 2, 17)] \
         [DataSourceBLS.COLUMN_CPI_U].values[0], 3) == 226.740
-    assert round(ds_data.loc[ds_data[BaseDataSource.DATE_COL] == date(2012, 2, 18)] \
+    assert round(ds_data.loc[ds_data[BaseDataSource.DATE_COL] == pd.Timestamp(2012, 2, 18)] \
         [DataSourceBLS.COLUMN_CPI_U].values[0], 3) == 227.237
     
 
@@ -22,7 +26,7 @@ def test_get_data_today():
     ds_bls = DataSourceBLS()
     ds_data = ds_bls.get_data(date(2012, 1, 1), datetime.now(pytz.timezone('US/Eastern')).date())
         
-    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == datetime.now(pytz.timezone('US/Eastern')).date()
+    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == pd.Timestamp(datetime.now(pytz.timezone('US/Eastern')).date())
 
 
 def test_get_columns():
@@ -32,3 +36,119 @@ def test_get_columns():
     
     data_columns = [column for column in ds_data.columns if column != BaseDataSource.DATE_COL]
     assert ds_columns == data_columns
+
+
+def test_get_release_dates_lag():
+    ds_bls = DataSourceBLS()
+    series = BLSSeries("ID", "TEST", "test", False, DataSourceBLS.MONTHLY, 48)
+
+    release_dates = ds_bls._get_release_dates(series, pd.DatetimeIndex(["2012-01-01", "2012-02-01"]))
+
+    assert release_dates.tolist() == [pd.Timestamp(2012, 2, 18), pd.Timestamp(2012, 3, 20)]
+
+
+def test_get_release_dates_calendar(tmp_path):
+    calendar_file = tmp_path / "calendar.csv"
+    calendar_file.write_text("period,release_date\n2012-01-01,2012-02-14\n")
+    ds_bls = DataSourceBLS()
+    series = BLSSeries("ID", "TEST", "test", False, DataSourceBLS.MONTHLY, 48, str(calendar_file))
+
+    release_dates = ds_bls._get_release_dates(series, pd.DatetimeIndex(["2012-01-01", "2012-02-01"]))
+
+    # calendar releases are usable the day after, periods missing from the calendar fall back to the lag
+    assert release_dates.tolist() == [pd.Timestamp(2012, 2, 15), pd.Timestamp(2012, 3, 20)]
+
+
+def test_get_release_dates_packaged_calendar(tmp_path):
+    (tmp_path / "calendar.csv").write_text("period,release_date\n2012-02-01,2012-03-09\n")
+    ds_bls = DataSourceBLS()
+    series = BLSSeries("ID", "TEST", "test", False, DataSourceBLS.MONTHLY, 48, "calendar.csv")
+
+    with patch.object(DataSourceBLS, "RELEASE_CALENDAR_DIRECTORY", str(tmp_path)):
+        release_dates = ds_bls._get_release_dates(series, pd.DatetimeIndex(["2012-01-01", "2012-02-01"]))
+
+    assert release_dates.tolist() == [pd.Timestamp(2012, 2, 18), pd.Timestamp(2012, 3, 10)]
+
+
+@patch.object(BaseDataSource, "_transform_graph", TransformGraph())
+def test_get_data_changes_share_release_lag():
+    ds_bls = DataSourceBLS()
+    periods = pd.date_range("2010-07-01", "2012-01-01", freq="MS")
+    ds_bls._get_observations = MagicMock(return_value={
+        series.series_id: pd.Series(range(100, 100 + len(periods)), index=periods, dtype="float64")
+        for series in DataSourceBLS.SERIES
+    })
+
+    ds_data = ds_bls.get_data(date(2012, 2, 17), date(2012, 2, 18))
+
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U].tolist() == [117.0, 118.0]
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U_MOM].tolist() == pytest.approx([1 / 116, 1 / 117])
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U_YOY].tolist() == pytest.approx([12 / 105, 12 / 106])
+    assert ds_data.columns.tolist() == [BaseDataSource.DATE_COL] + ds_bls.get_columns()
+
+
+@patch.object(BaseDataSource, "_transform_graph", TransformGraph())
+def test_get_data_window_features_share_release_lag():
+    ds_bls = DataSourceBLS()
+    periods = pd.date_range("2005-01-01", "2012-01-01", freq="MS")
+    ds_bls._get_observations = MagicMock(return_value={
+        series.series_id: pd.Series([100.0 + i + (i % 2) for i in range(len(periods))], index=periods)
+        for series in DataSourceBLS.SERIES
+    })
+
+    ds_data = ds_bls.get_data(date(2012, 2, 17), date(2012, 2, 18))
+
+    # december is the latest observation on the 17th and january on the 18th
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U].tolist() == [184.0, 184.0]
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U_SLOPE12].tolist() == pytest.approx([1.0, 1.0], abs=0.05)
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U_ACCELERATION36].tolist() == pytest.approx([0.0, 0.0], abs=1e-6)
+    assert ds_data[DataSourceBLS.COLUMN_CPI_U_RANK36].tolist() == [1.0, 1.0]
+    assert ds_data[DataSourceBLS.COLUMN_OUTPUT_RANK12].tolist() == [1.0, 1.0]
+    assert ds_data.notna().all().all()
+
+
+def test_catalog_columns():
+    ds_bls = DataSourceBLS()
+
+    assert DataSourceBLS.COLUMN_UE == "era_feature_bls_unemployment"
+    assert DataSourceBLS.COLUMN_CPI_U == "era_feature_raw_bls_cpi_u"
+    assert DataSourceBLS.COLUMN_CPI_U_YOY == "era_feature_bls_cpi_u_yoy"
+    # scale-free window features of raw series are not raw
+    assert DataSourceBLS.COLUMN_CPI_U_ZSCORE12 == "era_feature_bls_cpi_u_zscore12"
+    assert DataSourceBLS.COLUMN_CPI_U_SLOPE36 == "era_feature_raw_bls_cpi_u_slope36"
+    assert DataSourceBLS.COLUMN_OUTPUT_RANK12 == "era_feature_bls_output_rank12"
+    # value, change, year-over-year change and four window features over two windows per series
+    assert len(ds_bls.get_columns()) == 11 * len(DataSourceBLS.SERIES)
+
+
+def test_plan_requests_unregistered():
+    ds_bls = DataSourceBLS()
+    series_ids = [f"ID{i}" for i in range(30)]
+
+    with patch.dict("os.environ", {}, clear=True):
+        plan = ds_bls._plan_requests(series_ids, 2001, 2023)
+
+    assert len(plan) == 6
+    assert sorted({(start, end) for _, start, end in plan}) == [(2001, 2010), (2011, 2020), (2021, 2023)]
+    assert all(len(ids) == 15 for ids, _, _ in plan)
+
+
+def test_plan_requests_registered():
+    ds_bls = DataSourceBLS()
+    series_ids = [f"ID{i}" for i in range(30)]
+
+    with patch.dict("os.environ", {DataSourceBLS.API_KEY_ENV: "key"}):
+        plan = ds_bls._plan_requests(series_ids, 2001, 2023)
+
+    assert plan == [(series_ids, 2001, 2020), (series_ids, 2021, 2023)]
+
+
+def test_get_observations_timeout():
+    ds_bls = DataSourceBLS()
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"status": "REQUEST_SUCCEEDED", "Results": {"series": []}}
+
+    with patch("requests.post", return_value=response) as post:
+        ds_bls._get_observations(["ID"], date(2023, 1, 1), date(2023, 2, 1))
+
+    assert post.call_args.kwargs["timeout"] == DataSourceBLS.REQUEST_TIMEOUT
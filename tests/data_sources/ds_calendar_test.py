@@ -1,5 +1,7 @@
 from datetime import date
 
+import pandas as pd
+
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 from numerai_era_data.data_sources.ds_calendar import DataSourceCalendar
 
@@ -10,8 +12,8 @@ def test_get_data():
                                    date(2022, 1, 1))
     
     assert ds_data.shape[0] == 3654
-    assert ds_data.iloc[0][BaseDataSource.DATE_COL] == date(2012, 1, 1)
-    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == date(2022, 1, 1)
+    assert ds_data.iloc[0][BaseDataSource.DATE_COL] == pd.Timestamp(2012, 1, 1)
+    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == pd.Timestamp(2022, 1, 1)
 
 
 def test_get_columns():
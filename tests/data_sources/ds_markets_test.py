@@ -1,32 +1,145 @@
+import threading
 from datetime import date, datetime
 
+import numpy as np
+import pandas as pd
+import pytest
 import pytz
+from mock import MagicMock, patch
 
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 from numerai_era_data.data_sources.ds_markets import DataSourceMarkets
+from numerai_era_data.transform_graph import TransformGraph
 
 
-def test_get_data():
+@pytest.fixture
+def tmp_cache(tmp_path):
+    # keep the close cache and transform cache of the package out of the tests
+    with patch.object(DataSourceMarkets, "CLOSE_CACHE_FILE", str(tmp_path / "closes.parquet")), \
+            patch.object(BaseDataSource, "_transform_graph", TransformGraph(str(tmp_path / "transforms"))):
+        yield
+
+
+@pytest.fixture
+def mock_download(tmp_cache):
+    # trading days with increasing closes, including today's unfinished close
+    today = datetime.now(pytz.timezone("US/Eastern")).date()
+    index = pd.date_range("2000-01-01", today, freq=DataSourceMarkets._get_trading_day(), name="Date")
+    prices = pd.DataFrame({"Close": np.arange(len(index), dtype="float64") + 1000, "Open": 1.0}, index=index)
+
+    def download(ticker, start, end, **kwargs):
+        return prices[(prices.index >= pd.Timestamp(start)) & (prices.index < pd.Timestamp(end))]
+
+    with patch("yfinance.download", MagicMock(side_effect=download)) as download_mock:
+        yield download_mock
+
+
+def test_get_data(tmp_cache):
     ds_markets = DataSourceMarkets()
     ds_data = ds_markets.get_data(date(2012, 1, 1), date(2022, 1, 1))
     
-    assert ds_data.iloc[0][BaseDataSource.DATE_COL] == date(2012, 1, 1)
-    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == date(2022, 1, 1)
-    assert round(ds_data.loc[ds_data[BaseDataSource.DATE_COL] == date(2012, 10, 24)] \
+    assert ds_data.iloc[0][BaseDataSource.DATE_COL] == pd.Timestamp(2012, 1, 1)
+    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == pd.Timestamp(2022, 1, 1)
+    assert round(ds_data.loc[ds_data[BaseDataSource.DATE_COL] == pd.Timestamp(2012, 10, 24)] \
         [DataSourceMarkets.COLUMN_SPX_CLOSE].values[0], 2) == 1413.11
     
 
-def test_get_data_today():
+def test_get_data_today(tmp_cache):
     ds_markets = DataSourceMarkets()
     ds_data = ds_markets.get_data(date(2012, 1, 1), datetime.now(pytz.timezone('US/Eastern')).date())
         
-    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == datetime.now(pytz.timezone('US/Eastern')).date()
+    assert ds_data.iloc[-1][BaseDataSource.DATE_COL] == pd.Timestamp(datetime.now(pytz.timezone('US/Eastern')).date())
 
 
-def test_get_columns():
+def test_get_columns(tmp_cache):
     ds_markets = DataSourceMarkets()
     ds_columns = ds_markets.get_columns()
     ds_data = ds_markets.get_data(date(2012, 1, 1), date(2012, 1, 8))
     
     data_columns = [column for column in ds_data.columns if column != BaseDataSource.DATE_COL]
     assert ds_columns == data_columns
+
+
+def test_get_data_downloads_lookback_window(mock_download):
+    ds_markets = DataSourceMarkets()
+    ds_data = ds_markets.get_data(date(2023, 5, 22), date(2023, 5, 26))
+
+    start, end = mock_download.call_args.kwargs["start"], mock_download.call_args.kwargs["end"]
+    trading_days = pd.date_range(start, date(2023, 5, 21), freq=DataSourceMarkets._get_trading_day())
+    assert len(trading_days) == ds_markets._LOOKBACK_TRADING_DAYS + ds_markets._LOOKBACK_MARGIN_TRADING_DAYS
+    assert end == date(2023, 5, 26)
+    assert ds_data[ds_markets.COLUMN_SPX_SMA200].notna().all()
+    assert ds_data[ds_markets.COLUMN_SPX_RETURN200].notna().all()
+    # closes are available the day after their trading date
+    closes = ds_data.set_index(BaseDataSource.DATE_COL)[DataSourceMarkets.COLUMN_SPX_CLOSE]
+    assert closes[pd.Timestamp(2023, 5, 23)] + 1 == closes[pd.Timestamp(2023, 5, 24)]
+
+
+def test_get_data_reuses_cached_closes(mock_download):
+    full_data = DataSourceMarkets().get_data(date(2010, 1, 1), date(2023, 6, 1))
+    mock_download.reset_mock()
+
+    daily_data = DataSourceMarkets().get_data(date(2023, 5, 24), date(2023, 5, 24))
+    mock_download.assert_not_called()
+
+    DataSourceMarkets().get_data(date(2023, 6, 6), date(2023, 6, 6))
+    assert mock_download.call_args.kwargs == {
+        "start": date(2023, 6, 1), "end": date(2023, 6, 6), "timeout": DataSourceMarkets.REQUEST_TIMEOUT
+    }
+
+    # exponential moving averages match the full history
+    pd.testing.assert_frame_equal(
+        daily_data.reset_index(drop=True),
+        full_data[full_data[BaseDataSource.DATE_COL] == pd.Timestamp(2023, 5, 24)].reset_index(drop=True),
+    )
+
+
+def test_get_data_skips_holidays(mock_download):
+    # the cache ends on the friday before memorial day
+    DataSourceMarkets().get_data(date(2023, 5, 24), date(2023, 5, 27))
+    mock_download.reset_mock()
+
+    DataSourceMarkets().get_data(date(2023, 5, 30), date(2023, 5, 30))
+    mock_download.assert_not_called()
+
+
+def test_close_cache_excludes_today(mock_download):
+    today = datetime.now(pytz.timezone("US/Eastern")).date()
+
+    DataSourceMarkets().get_data(date(2023, 5, 24), today)
+
+    cached = pd.read_parquet(DataSourceMarkets.CLOSE_CACHE_FILE)
+    assert cached.index[-1] < pd.Timestamp(today)
+
+
+def test_write_close_cache_concurrent_writers(tmp_cache):
+    closes = pd.DataFrame(
+        {DataSourceMarkets.COLUMN_SPX_CLOSE: np.arange(1000, dtype="float64")},
+        index=pd.date_range("2000-01-03", periods=1000, name=BaseDataSource.DATE_COL),
+    )
+    barrier = threading.Barrier(4)
+    errors = []
+
+    def write():
+        barrier.wait()
+        try:
+            DataSourceMarkets()._write_close_cache(closes)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    pd.testing.assert_frame_equal(pd.read_parquet(DataSourceMarkets.CLOSE_CACHE_FILE), closes, check_freq=False)
+
+
+def test_trading_day_skips_nyse_holidays():
+    trading_day = DataSourceMarkets._get_trading_day()
+
+    # good friday and juneteenth
+    assert pd.Timestamp(2023, 4, 10) - trading_day == pd.Timestamp(2023, 4, 6)
+    assert pd.Timestamp(2023, 6, 20) - trading_day == pd.Timestamp(2023, 6, 16)
@@ -1,9 +1,11 @@
 from datetime import date, datetime, timezone
 
+import numpy as np
 from mock import patch
 
 from numerai_era_data.date_utils import (get_current_date, get_current_era,
-                                         get_date_for_era, get_era_for_date)
+                                         get_date_for_era, get_era_for_date,
+                                         get_eras_for_dates)
 
 
 def test_get_current_era():
@@ -33,3 +35,7 @@ def test_get_date_for_era_1():
 
 def test_get_date_for_era_1063():
     assert get_date_for_era(1063) == date(2023, 5, 20)
+
+def test_get_eras_for_dates():
+    dates = np.array(["2003-01-11", "2023-05-26", "2023-05-27"], dtype="datetime64[ns]")
+    assert get_eras_for_dates(dates).tolist() == [1, 1063, 1064]
@@ -0,0 +1,91 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from mock import patch
+
+from numerai_era_data import era_data_api
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+
+pytest.importorskip("polars")
+
+
+def make_frames(seed: int, num_columns: int) -> list:
+    # daily, weekly and trading-day sources with gaps, like the real data sources
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(date(2003, 1, 11), date(2004, 6, 30))
+    frames = []
+    for i, freq in enumerate([1, 7, 5]):
+        rows = dates[::freq]
+        values = rng.normal(size=(len(rows), num_columns))
+        values[rng.random(values.shape) < 0.1] = np.nan
+        data = pd.DataFrame(values, columns=[f"source{i}_column{j}" for j in range(num_columns)])
+        data.insert(0, BaseDataSource.DATE_COL, rows)
+        frames.append(data)
+    frames.append(pd.DataFrame({BaseDataSource.DATE_COL: dates, "source3_int": np.arange(len(dates))}))
+    return frames
+
+
+def assert_engines_equal(frames: list, cache: pd.DataFrame):
+    expected = era_data_api.EraDataAPI._assemble_eras(frames, cache)
+    result = era_data_api.EraDataAPI._assemble_eras_polars(frames, cache).to_pandas()
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_assemble_eras_equivalent(seed):
+    assert_engines_equal(make_frames(seed, 4), pd.DataFrame())
+
+
+def test_assemble_eras_equivalent_single_source():
+    assert_engines_equal(make_frames(0, 3)[:1], pd.DataFrame())
+
+
+def test_assemble_eras_equivalent_with_cache():
+    frames = make_frames(0, 2)
+    cache = era_data_api.EraDataAPI._assemble_eras(make_frames(1, 3), pd.DataFrame()).iloc[:20]
+
+    assert_engines_equal(frames[:2], cache)
+
+
+def test_update_data_polars(tmp_path):
+    from numerai_era_data.era_data_api import EraDataAPI
+
+    frames = make_frames(0, 2)
+    sources = []
+    for data in frames:
+        class MockDataSource:
+            frame = data
+
+            def get_columns(self):
+                return self.frame.columns.drop(BaseDataSource.DATE_COL).tolist()
+
+            def get_data(self, start_date, end_date):
+                return self.frame.copy()
+
+        sources.append(MockDataSource)
+
+    results = {}
+    for engine in EraDataAPI.ENGINES:
+        instance = EraDataAPI(engine=engine)
+        instance.DATA_CACHE_FILE = str(tmp_path / f"{engine}.parquet")
+        instance._get_data_sources = lambda: sources
+        with patch("numerai_era_data.date_utils.get_current_era", return_value=77):
+            instance.update_data()
+        results[engine] = instance
+
+    pd.testing.assert_frame_equal(results["polars"].data_cache, results["pandas"].data_cache)
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(results["polars"].DATA_CACHE_FILE), pd.read_parquet(results["pandas"].DATA_CACHE_FILE)
+    )
+    pd.testing.assert_frame_equal(
+        results["polars"].get_all_eras_arrow(False).to_pandas(),
+        results["pandas"].get_all_eras_arrow(False).to_pandas(),
+    )
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        era_data_api.EraDataAPI(engine="unknown")
@@ -1,13 +1,19 @@
+import asyncio
+import json
 import os
+import threading
+import time
 from datetime import date, timedelta
 
 import pandas as pd
+import pyarrow.parquet as pq
 import pytest
 from mock import MagicMock, patch
 
 from numerai_era_data import era_data_api
 from numerai_era_data.data_sources.base_data_source import BaseDataSource
 from numerai_era_data.date_utils import ERA_ONE_START, get_date_for_era
+from numerai_era_data.transform_graph import TransformGraph
 
 
 class MockDataSource:
@@ -52,6 +58,7 @@ def manage_cache():
     instance = era_data_api.EraDataAPI()
     instance.DATA_CACHE_FILE = "test_data_cache.parquet"
     instance.DAILY_CACHE_FILE = "test_daily_cache.parquet" 
+    era_data_api.EraDataAPI._circuit_breakers.clear()
 
     yield instance
 
@@ -268,3 +275,483 @@ def test_get_current_daily_no_update_stale(manage_cache):
     
     assert df[BaseDataSource.DATE_COL].tolist() == [data_date]
     assert df["column1"].tolist() == [1]
+
+
+def test_update_data_with_data_sources_keeps_other_columns(manage_cache):
+    instance = manage_cache
+    instance.data_cache = pd.DataFrame(
+        {BaseDataSource.ERA_COL: ["0001", "0002"], "column0": [7, 8], "column1": [0, 0]}
+    )
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=3):
+        instance.update_data([MockDataSource])
+
+    assert instance.data_cache[BaseDataSource.ERA_COL].tolist() == ["0001", "0002", "0003"]
+    assert instance.data_cache.columns.tolist() == [BaseDataSource.ERA_COL, "column0", "column1", "column2", "column3"]
+    assert instance.data_cache["column0"].tolist() == [7, 8, 8]
+    assert instance.data_cache["column1"].tolist() == [1, 1, 1]
+
+
+def test_update_daily_data_with_data_sources_keeps_other_columns(manage_cache):
+    instance = manage_cache
+    instance.daily_cache = pd.DataFrame(
+        {BaseDataSource.DATE_COL: [date(2001, 4, 19)], "column0": [7], BaseDataSource.ERA_COL: ["X"]}
+    )
+    data_date = date(2001, 4, 20)
+
+    with patch("numerai_era_data.date_utils.get_current_date", return_value=data_date):
+        instance.update_daily_data([MockDataSource])
+
+    assert instance.daily_cache[BaseDataSource.DATE_COL].tolist() == [data_date]
+    assert instance.daily_cache["column0"].tolist() == [7]
+    assert instance.daily_cache["column5"].tolist() == [5]
+
+
+def test_update_data_with_exception_keeps_cached_values(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSourceWithException])
+    instance.data_cache = pd.DataFrame(
+        {BaseDataSource.ERA_COL: ["0001", "0002"], "column0": [0, 0], "column2": [5, 6], "column3": [7, 8]}
+    )
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=3):
+        instance.update_data()
+
+    assert instance.data_cache[BaseDataSource.ERA_COL].tolist() == ["0001", "0002", "0003"]
+    assert instance.data_cache.columns.tolist() == [BaseDataSource.ERA_COL, "column2", "column3"]
+    assert instance.data_cache["column2"].tolist() == [5, 6, 6]
+    assert instance.data_cache["column3"].tolist() == [7, 8, 8]
+
+
+def test_update_data_incremental(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSource])
+    instance.INCREMENTAL_REFETCH_ERAS = 1
+    instance.data_cache = pd.DataFrame(
+        {BaseDataSource.ERA_COL: ["0001", "0002", "0003"], "column1": [9, 9, 9]}
+    )
+    mock_get_data = MagicMock(wraps=MockDataSource().get_data)
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=4), \
+            patch.object(MockDataSource, "get_data", side_effect=mock_get_data):
+        instance.update_data(incremental=True)
+
+    assert mock_get_data.call_args.args == (get_date_for_era(2), get_date_for_era(4))
+    assert instance.data_cache[BaseDataSource.ERA_COL].tolist() == ["0001", "0002", "0003", "0004"]
+    assert instance.data_cache["column1"].tolist() == [9, 9, 9, 9]
+    assert instance.data_cache["column4"].tolist()[-1] == 4
+
+
+def test_update_data_circuit_breaker(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSourceWithException])
+    instance.data_cache = pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column2": [2], "column3": [3]})
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2), \
+            patch.object(
+                MockDataSourceWithException, "get_data", side_effect=Exception("Test exception")
+            ) as get_data, \
+            patch("logging.error") as log_error:
+        for _ in range(era_data_api.CircuitBreaker.FAILURE_THRESHOLD + 2):
+            instance.update_data()
+
+    assert get_data.call_count == era_data_api.CircuitBreaker.FAILURE_THRESHOLD
+    # skipped sources are logged at a level the exception log records
+    skipped = [call for call in log_error.call_args_list if "circuit breaker is open" in call.args[0]]
+    assert len(skipped) == 2
+    assert instance.data_cache["column2"].tolist() == [2, 2]
+
+
+def test_circuit_breaker_opening_is_atomic():
+    circuit_breaker = era_data_api.CircuitBreaker()
+    for _ in range(circuit_breaker.FAILURE_THRESHOLD - 1):
+        circuit_breaker.record_failure()
+    opening = threading.Event()
+    release = threading.Event()
+
+    def monotonic():
+        opening.set()
+        release.wait(5)
+        return 0.0
+
+    # the last failure opens the breaker while a concurrent fetch asks whether it may run
+    with patch("numerai_era_data.era_data_api.monotonic", side_effect=monotonic):
+        failure = threading.Thread(target=circuit_breaker.record_failure)
+        failure.start()
+        opening.wait(5)
+        allowed = []
+        check = threading.Thread(target=lambda: allowed.append(circuit_breaker.allow()))
+        check.start()
+        check.join(0.1)
+        release.set()
+        failure.join()
+        check.join()
+
+    assert allowed == [False]
+
+
+def test_circuit_breaker_resets():
+    circuit_breaker = era_data_api.CircuitBreaker()
+    for _ in range(circuit_breaker.FAILURE_THRESHOLD):
+        circuit_breaker.record_failure()
+
+    assert not circuit_breaker.allow()
+
+    circuit_breaker.opened_at -= circuit_breaker.RESET_SECONDS
+    assert circuit_breaker.allow()
+
+    circuit_breaker.record_failure()
+    assert not circuit_breaker.allow()
+
+    circuit_breaker.opened_at -= circuit_breaker.RESET_SECONDS
+    circuit_breaker.allow()
+    circuit_breaker.record_success()
+    assert circuit_breaker.allow()
+    assert circuit_breaker.failures == 0
+
+
+def test_update_daily_data_with_exception_keeps_daily_values(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSourceWithException])
+    instance.data_cache = pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column2": [2], "column3": [3]})
+    instance.daily_cache = pd.DataFrame(
+        {BaseDataSource.DATE_COL: [date(2001, 4, 19)], "column2": [4], BaseDataSource.ERA_COL: ["X"]}
+    )
+    data_date = date(2001, 4, 20)
+
+    with patch("numerai_era_data.date_utils.get_current_date", return_value=data_date):
+        instance.update_daily_data()
+
+    assert instance.daily_cache[BaseDataSource.DATE_COL].tolist() == [data_date]
+    assert instance.daily_cache["column2"].tolist() == [4]
+    assert instance.daily_cache["column3"].tolist() == [3]
+    assert instance.daily_cache.columns.tolist()[-1] == BaseDataSource.ERA_COL
+
+
+def test_cache_files_shared_between_instances(tmp_path):
+    data_cache_file = str(tmp_path / "data.parquet")
+    pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column1": [1]}).to_parquet(data_cache_file)
+
+    with patch.object(era_data_api.EraDataAPI, "DATA_CACHE_FILE", data_cache_file), \
+            patch.object(era_data_api.EraDataAPI, "DAILY_CACHE_FILE", str(tmp_path / "daily.parquet")), \
+            patch("pyarrow.parquet.read_table", wraps=pq.read_table) as read_table:
+        first = era_data_api.EraDataAPI(server_url="")
+        second = era_data_api.EraDataAPI(server_url="")
+
+        assert second.data_cache is first.data_cache
+        assert read_table.call_count == 1
+
+        # another process replaces the file
+        pd.DataFrame({BaseDataSource.ERA_COL: ["0001", "0002"], "column1": [1, 2]}).to_parquet(data_cache_file)
+        os.utime(data_cache_file, ns=(0, 0))
+        first._get_data_sources = MagicMock(return_value=[MockDataSource])
+
+        with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+            df = first.get_all_eras()
+
+        assert df[BaseDataSource.ERA_COL].tolist() == ["0001", "0002"]
+        assert read_table.call_count == 2
+
+
+def test_update_data_shares_written_cache(manage_cache, tmp_path):
+    instance = manage_cache
+    instance.DATA_CACHE_FILE = str(tmp_path / "data.parquet")
+    instance._get_data_sources = MagicMock(return_value=[MockDataSource])
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+        instance.update_data()
+
+    with patch.object(era_data_api.EraDataAPI, "DATA_CACHE_FILE", instance.DATA_CACHE_FILE), \
+            patch("pyarrow.parquet.read_table") as read_table:
+        other = era_data_api.EraDataAPI(server_url="")
+
+    assert other.data_cache is instance.data_cache
+    read_table.assert_not_called()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_get_columns_once_per_class():
+    class CountingDataSource:
+        instances = 0
+
+        def __init__(self):
+            CountingDataSource.instances += 1
+
+        def get_columns(self):
+            return ["column1"]
+
+    for _ in range(3):
+        assert era_data_api.EraDataAPI._get_columns(CountingDataSource) == ("column1",)
+
+    assert CountingDataSource.instances == 1
+
+
+class MockManifestDataSource:
+    columns = []
+    fetches = []
+
+    def get_columns(self):
+        return self.columns
+
+    def get_data(self, start_date, end_date):
+        self.fetches.append((type(self).__name__, start_date))
+        return pd.DataFrame({BaseDataSource.DATE_COL: [ERA_ONE_START]} | {column: [1] for column in self.columns})
+
+
+class MockDataSourceA(MockManifestDataSource):
+    columns = ["column_a"]
+
+
+class MockDataSourceB(MockManifestDataSource):
+    columns = ["column_b"]
+
+
+@pytest.fixture
+def manifest_cache(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSourceA, MockDataSourceB])
+    MockManifestDataSource.fetches = []
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        instance.update_data()
+    MockManifestDataSource.fetches.clear()
+
+    yield instance
+
+    clear_columns()
+
+
+def clear_columns():
+    # source columns are cached per class, so tests that change them must clear the cache
+    era_data_api.EraDataAPI._get_columns.cache_clear()
+    era_data_api.EraDataAPI._get_all_columns.cache_clear()
+
+
+def test_update_data_writes_manifest(manifest_cache):
+    metadata = pq.read_schema(manifest_cache.DATA_CACHE_FILE).metadata
+    manifest = json.loads(metadata[era_data_api.EraDataAPI.MANIFEST_KEY])
+
+    assert manifest == {
+        "MockDataSourceA": {"version": 1, "columns": ["column_a"]},
+        "MockDataSourceB": {"version": 1, "columns": ["column_b"]},
+    }
+    assert era_data_api.EraDataAPI(server_url="")._read_cache_file(manifest_cache.DATA_CACHE_FILE)[2] == manifest
+
+
+def test_get_all_eras_added_columns_fetch_affected_source(manifest_cache):
+    instance = manifest_cache
+
+    with patch.object(MockDataSourceB, "columns", ["column_b", "column_c"]), \
+            patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        clear_columns()
+        df = instance.get_all_eras()
+
+    assert MockManifestDataSource.fetches == [("MockDataSourceB", get_date_for_era(1))]
+    assert df.columns.tolist() == [BaseDataSource.ERA_COL, "column_a", "column_b", "column_c"]
+    assert instance.data_manifest["MockDataSourceB"]["columns"] == ["column_b", "column_c"]
+
+
+def test_get_all_eras_version_changed_refetches_source(manifest_cache):
+    instance = manifest_cache
+
+    with patch.object(MockDataSourceA, "VERSION", 2, create=True), \
+            patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        instance.get_all_eras()
+        instance.get_all_eras()
+
+    assert MockManifestDataSource.fetches == [("MockDataSourceA", get_date_for_era(1))]
+    assert instance.data_manifest["MockDataSourceA"]["version"] == 2
+
+
+def test_get_all_eras_removed_columns_dropped_without_fetch(manifest_cache):
+    instance = manifest_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSourceA])
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        df = instance.get_all_eras()
+
+    assert MockManifestDataSource.fetches == []
+    assert df.columns.tolist() == [BaseDataSource.ERA_COL, "column_a"]
+    assert pd.read_parquet(instance.DATA_CACHE_FILE).columns.tolist() == [BaseDataSource.ERA_COL, "column_a"]
+    assert list(instance.data_manifest) == ["MockDataSourceA"]
+
+
+def test_get_all_eras_cache_without_manifest(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSourceA, MockDataSourceB])
+    instance.data_cache = pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column_a": [1]})
+    MockManifestDataSource.fetches = []
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        df = instance.get_all_eras()
+
+    assert MockManifestDataSource.fetches == [("MockDataSourceB", get_date_for_era(1))]
+    assert df.columns.tolist() == [BaseDataSource.ERA_COL, "column_a", "column_b"]
+    assert set(instance.data_manifest) == {"MockDataSourceA", "MockDataSourceB"}
+
+
+def test_get_current_daily_added_columns_fetch_affected_source(manifest_cache):
+    instance = manifest_cache
+
+    with patch("numerai_era_data.date_utils.get_current_date", return_value=ERA_ONE_START):
+        instance.update_daily_data()
+        MockManifestDataSource.fetches.clear()
+
+        with patch.object(MockDataSourceA, "columns", ["column_a", "column_c"]):
+            clear_columns()
+            df = instance.get_current_daily()
+
+    assert MockManifestDataSource.fetches == [("MockDataSourceA", ERA_ONE_START)]
+    assert df[["column_a", "column_b", "column_c"]].values.tolist() == [[1, 1, 1]]
+
+
+class MockBlockingDataSource(MockManifestDataSource):
+    columns = ["column_a"]
+    # every fetch waits at the barrier, so fetches only complete if they run concurrently
+    barrier = None
+
+    def get_data(self, start_date, end_date):
+        if self.barrier is not None:
+            self.barrier.wait()
+        return super().get_data(start_date, end_date)
+
+
+class MockBlockingDataSourceB(MockBlockingDataSource):
+    columns = ["column_b"]
+
+
+@pytest.fixture
+def async_cache(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockBlockingDataSource, MockBlockingDataSourceB])
+    MockManifestDataSource.fetches = []
+    MockBlockingDataSource.barrier = threading.Barrier(2, timeout=5)
+
+    yield instance
+
+    MockBlockingDataSource.barrier = None
+
+
+def test_aupdate_data_fetches_concurrently(async_cache):
+    instance = async_cache
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        asyncio.run(instance.aupdate_data())
+
+    assert sorted(MockManifestDataSource.fetches) == [
+        ("MockBlockingDataSource", get_date_for_era(1)), ("MockBlockingDataSourceB", get_date_for_era(1))
+    ]
+    assert instance.data_cache.columns.tolist() == [BaseDataSource.ERA_COL, "column_a", "column_b"]
+    assert pd.read_parquet(instance.DATA_CACHE_FILE).equals(instance.data_cache)
+
+
+def test_aget_all_eras_coalesces_refreshes(async_cache):
+    instance = async_cache
+
+    async def get_all_eras_concurrently():
+        return await asyncio.gather(*[instance.aget_all_eras() for _ in range(5)])
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        results = asyncio.run(get_all_eras_concurrently())
+
+    assert len(MockManifestDataSource.fetches) == 2
+    assert all(result is instance.data_cache for result in results)
+    assert instance._in_flight == {}
+
+
+def test_aget_all_eras_returns_cached_data(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockDataSource])
+    instance.data_cache = pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column1": [1]})
+    instance.update_data = MagicMock()
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        df = asyncio.run(instance.aget_all_eras())
+
+    assert df is instance.data_cache
+    instance.update_data.assert_not_called()
+
+
+def test_aupdate_data_waits_for_update_in_flight(async_cache):
+    instance = async_cache
+    MockBlockingDataSource.barrier = None
+
+    async def update_concurrently():
+        await asyncio.gather(instance.aupdate_data(), instance.aupdate_data([MockBlockingDataSourceB]))
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        asyncio.run(update_concurrently())
+
+    assert [name for name, _ in MockManifestDataSource.fetches][-1] == "MockBlockingDataSourceB"
+    assert len(MockManifestDataSource.fetches) == 3
+    assert instance.data_cache.columns.tolist() == [BaseDataSource.ERA_COL, "column_a", "column_b"]
+
+
+def test_aget_current_daily_coalesces_refreshes(async_cache):
+    instance = async_cache
+
+    async def get_current_daily_concurrently():
+        return await asyncio.gather(*[instance.aget_current_daily() for _ in range(3)])
+
+    with patch("numerai_era_data.date_utils.get_current_date", return_value=ERA_ONE_START):
+        results = asyncio.run(get_current_daily_concurrently())
+
+    assert len(MockManifestDataSource.fetches) == 2
+    assert all(result is instance.daily_cache for result in results)
+    assert results[0][["column_a", "column_b"]].values.tolist() == [[1, 1]]
+
+
+class MockTransformDataSource(BaseDataSource):
+    # one value per day, doubled by a transform of the shared graph
+    def get_columns(self):
+        return ["column_t"]
+
+    def get_data(self, start_date, end_date):
+        dates = pd.date_range(start_date, end_date)
+        graph = self._get_transform_graph()
+        with graph.lock:
+            graph.add_source("mock_days", pd.DataFrame({"column_t": 1.0}, index=dates))
+            graph.add_transform("mock_doubled", lambda days: days * 2, ["mock_days"])
+            # leave time for a concurrent fetch to replace the source
+            time.sleep(0.1)
+            doubled = graph.get("mock_doubled")
+        return pd.DataFrame({BaseDataSource.DATE_COL: dates, "column_t": doubled["column_t"].values})
+
+
+def test_aget_all_eras_and_current_daily_share_transform_graph(manage_cache):
+    instance = manage_cache
+    instance._get_data_sources = MagicMock(return_value=[MockTransformDataSource])
+
+    async def get_concurrently():
+        return await asyncio.gather(instance.aget_all_eras(), instance.aget_current_daily())
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2), \
+            patch("numerai_era_data.date_utils.get_current_date", return_value=get_date_for_era(2)), \
+            patch.object(BaseDataSource, "_transform_graph", TransformGraph()):
+        data, daily = asyncio.run(get_concurrently())
+
+    assert data["column_t"].tolist() == [2.0, 2.0]
+    assert daily["column_t"].tolist() == [2.0]
+
+
+def test_aget_all_eras_client_coalesces_requests():
+    instance = era_data_api.EraDataAPI(server_url="http://localhost")
+    instance._get_from_server = MagicMock(return_value=pd.DataFrame({BaseDataSource.ERA_COL: ["0001"]}))
+
+    async def get_all_eras_concurrently():
+        return await asyncio.gather(*[instance.aget_all_eras() for _ in range(3)])
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=1):
+        asyncio.run(get_all_eras_concurrently())
+
+    instance._get_from_server.assert_called_once()
+
+
+def test_aget_all_eras_client_fetches_empty_data_without_update():
+    instance = era_data_api.EraDataAPI(server_url="http://localhost")
+    instance._get_from_server = MagicMock(return_value=pd.DataFrame({BaseDataSource.ERA_COL: ["0001"]}))
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+        df = asyncio.run(instance.aget_all_eras(update_if_stale=False))
+
+    assert df[BaseDataSource.ERA_COL].tolist() == ["0001"]
@@ -0,0 +1,139 @@
+import threading
+from datetime import date
+
+import pandas as pd
+import pytest
+import requests
+from mock import MagicMock, patch
+
+from numerai_era_data import era_data_server
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+from numerai_era_data.era_data_api import EraDataAPI
+
+
+@pytest.fixture
+def running_server():
+    api = MagicMock()
+    api.get_all_eras.return_value = pd.DataFrame({BaseDataSource.ERA_COL: ["0001", "0002"], "column1": [1.0, 2.0]})
+    api.get_current_daily.return_value = pd.DataFrame(
+        {BaseDataSource.DATE_COL: [date(2022, 1, 1)], "column1": [3.0], BaseDataSource.ERA_COL: ["X"]}
+    )
+    server = era_data_server.EraDataServer(api)
+    http_server = server.make_http_server(port=0)
+    thread = threading.Thread(target=http_server.serve_forever, daemon=True)
+    thread.start()
+
+    yield api, f"http://127.0.0.1:{http_server.server_address[1]}"
+
+    http_server.shutdown()
+    http_server.server_close()
+
+
+def test_arrow_ipc_round_trip():
+    data = pd.DataFrame({BaseDataSource.ERA_COL: ["0001"], "column1": [1.5]})
+
+    result = era_data_server.from_arrow_ipc(era_data_server.to_arrow_ipc(data))
+
+    pd.testing.assert_frame_equal(result, data)
+
+
+def test_health(running_server):
+    _, url = running_server
+
+    response = requests.get(url + era_data_server.HEALTH_PATH)
+
+    assert response.status_code == 200
+
+
+def test_unknown_path(running_server):
+    _, url = running_server
+
+    response = requests.get(url + "/unknown")
+
+    assert response.status_code == 404
+
+
+def test_client_get_all_eras(running_server):
+    _, url = running_server
+    client = EraDataAPI(server_url=url)
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+        df = client.get_all_eras()
+
+    assert df[BaseDataSource.ERA_COL].tolist() == ["0001", "0002"]
+    assert df["column1"].tolist() == [1.0, 2.0]
+
+
+def test_client_get_current_daily(running_server):
+    _, url = running_server
+    client = EraDataAPI(server_url=url)
+
+    with patch("numerai_era_data.date_utils.get_current_date", return_value=date(2022, 1, 1)):
+        df = client.get_current_daily()
+
+    assert df[BaseDataSource.DATE_COL].tolist() == [date(2022, 1, 1)]
+    assert df[BaseDataSource.ERA_COL].tolist() == ["X"]
+
+
+def test_client_memoizes_until_stale(running_server):
+    api, url = running_server
+    client = EraDataAPI(server_url=url)
+    client._get_from_server = MagicMock(wraps=client._get_from_server)
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+        client.get_all_eras()
+        client.get_all_eras()
+
+    assert client._get_from_server.call_count == 1
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=3):
+        client.get_all_eras()
+
+    assert client._get_from_server.call_count == 2
+
+
+def test_client_fetches_empty_data_without_update(running_server):
+    _, url = running_server
+    client = EraDataAPI(server_url=url)
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=3), \
+            patch("numerai_era_data.date_utils.get_current_date", return_value=date(2022, 1, 2)):
+        eras = client.get_all_eras(update_if_stale=False)
+        daily = client.get_current_daily(update_if_stale=False)
+
+    assert eras[BaseDataSource.ERA_COL].tolist() == ["0001", "0002"]
+    assert daily["column1"].tolist() == [3.0]
+
+
+def test_server_reuses_payload_within_era(running_server):
+    api, url = running_server
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+        requests.get(url + era_data_server.ERAS_PATH)
+        requests.get(url + era_data_server.ERAS_PATH)
+
+    assert api.get_all_eras.call_count == 1
+
+
+def test_server_rebuilds_payload_when_cache_file_changes(running_server, tmp_path):
+    api, url = running_server
+    api.DATA_CACHE_FILE = str(tmp_path / "era_data.parquet")
+    api._get_file_key = EraDataAPI._get_file_key
+
+    with patch("numerai_era_data.date_utils.get_current_era", return_value=2):
+        requests.get(url + era_data_server.ERAS_PATH)
+        # a refresh on the server host rewrites the cache file within the era
+        (tmp_path / "era_data.parquet").write_bytes(b"refreshed")
+        requests.get(url + era_data_server.ERAS_PATH)
+        requests.get(url + era_data_server.ERAS_PATH)
+
+    assert api.get_all_eras.call_count == 2
+
+
+def test_server_error(running_server):
+    api, url = running_server
+    api.get_all_eras.side_effect = Exception("Test exception")
+
+    response = requests.get(url + era_data_server.ERAS_PATH)
+
+    assert response.status_code == 500
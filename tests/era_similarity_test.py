@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+from mock import MagicMock
+
+from numerai_era_data import era_similarity
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+from numerai_era_data.era_data_api import EraDataAPI
+
+FEATURE1 = BaseDataSource._BASE_PREFIX + "feature1"
+FEATURE2 = BaseDataSource._BASE_PREFIX + "feature2"
+RAW_FEATURE = BaseDataSource._BASE_PREFIX_RAW + "feature"
+
+
+def make_eras(num_eras: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        BaseDataSource.ERA_COL: [str(i).zfill(4) for i in range(1, num_eras + 1)],
+        FEATURE1: rng.normal(size=num_eras),
+        FEATURE2: rng.normal(scale=100, size=num_eras),
+        RAW_FEATURE: rng.normal(size=num_eras),
+    })
+
+
+def expected_neighbours(data: pd.DataFrame, row: pd.DataFrame, k: int) -> list:
+    values = data[[FEATURE1, FEATURE2]].to_numpy()
+    standardized = (values - values.mean(axis=0)) / values.std(axis=0)
+    query = (row[[FEATURE1, FEATURE2]].to_numpy()[0] - values.mean(axis=0)) / values.std(axis=0)
+    distances = np.sqrt(((standardized - query) ** 2).sum(axis=1))
+    return data[BaseDataSource.ERA_COL].to_numpy()[np.argsort(distances)[:k]].tolist()
+
+
+def test_get_feature_columns():
+    assert era_similarity.get_feature_columns(make_eras(3)) == [FEATURE1, FEATURE2]
+
+
+@pytest.mark.parametrize("tree", [False, True])
+def test_query(tree):
+    if tree:
+        pytest.importorskip("sklearn")
+    data = make_eras(500)
+    row = make_eras(1, seed=1)
+
+    index = era_similarity.EraSimilarityIndex(data, tree=tree)
+    result = index.query(row, k=5)
+
+    assert result[BaseDataSource.ERA_COL].tolist() == expected_neighbours(data, row, 5)
+    assert result[era_similarity.DISTANCE_COL].is_monotonic_increasing
+
+
+def test_query_missing_values_are_mean():
+    data = make_eras(50)
+    row = make_eras(1, seed=1)
+    row[FEATURE2] = np.nan
+    mean_row = row.copy()
+    mean_row[FEATURE2] = data[FEATURE2].mean()
+
+    index = era_similarity.EraSimilarityIndex(data)
+
+    pd.testing.assert_frame_equal(index.query(row, k=3), index.query(mean_row, k=3))
+
+
+@pytest.mark.parametrize("tree", [False, True])
+def test_add_eras(tree):
+    if tree:
+        pytest.importorskip("sklearn")
+    data = make_eras(300)
+    row = make_eras(1, seed=1)
+    index = era_similarity.EraSimilarityIndex(data.iloc[:200], tree=tree)
+    means, stds = index.means.copy(), index.stds.copy()
+
+    # new eras plus a revised copy of an indexed era that exactly matches the query
+    revised = data.iloc[200:].copy()
+    revised.loc[revised.index[-1], BaseDataSource.ERA_COL] = "0007"
+    revised.loc[revised.index[-1], [FEATURE1, FEATURE2]] = row[[FEATURE1, FEATURE2]].to_numpy()[0]
+    index.add(revised)
+    result = index.query(row, k=3)
+
+    assert len(index) == 299
+    np.testing.assert_array_equal(index.means, means)
+    np.testing.assert_array_equal(index.stds, stds)
+    assert result[BaseDataSource.ERA_COL].tolist()[0] == "0007"
+    assert result[era_similarity.DISTANCE_COL].tolist()[0] == pytest.approx(0.0, abs=1e-7)
+    assert len(set(result[BaseDataSource.ERA_COL])) == 3
+
+
+def test_cluster():
+    rng = np.random.default_rng(0)
+    data = make_eras(60)
+    data[FEATURE1] = np.repeat([-10.0, 0.0, 10.0], 20) + rng.normal(scale=0.1, size=60)
+
+    clusters = era_similarity.EraSimilarityIndex(data, columns=[FEATURE1]).cluster(3)
+
+    assert clusters[BaseDataSource.ERA_COL].tolist() == data[BaseDataSource.ERA_COL].tolist()
+    labels = clusters[era_similarity.CLUSTER_COL].to_numpy()
+    assert [len(set(labels[i:i + 20])) for i in range(0, 60, 20)] == [1, 1, 1]
+    assert len(set(labels)) == 3
+
+
+def test_get_similar_eras_adds_new_eras():
+    data = make_eras(100)
+    daily = make_eras(1, seed=1).assign(**{BaseDataSource.ERA_COL: "X"})
+    data.loc[94, [FEATURE1, FEATURE2]] = daily[[FEATURE1, FEATURE2]].to_numpy()[0]
+    instance = EraDataAPI(server_url="")
+    instance.get_all_eras = MagicMock(return_value=data.iloc[:90])
+    instance.get_current_daily = MagicMock(return_value=daily)
+
+    instance.get_similar_eras(k=3)
+    index = instance.get_similarity_index()
+    instance.get_all_eras.return_value = data
+    result = instance.get_similar_eras(k=3)
+
+    assert instance.get_similarity_index() is index
+    assert len(index) == 100
+    assert result[BaseDataSource.ERA_COL].tolist()[0] == "0095"
@@ -0,0 +1,78 @@
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from numerai_era_data import parquet_writer
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+
+
+@pytest.fixture
+def table():
+    rng = np.random.default_rng(0)
+    return pa.table({
+        BaseDataSource.ERA_COL: [str(era).zfill(4) for era in range(10, 0, -1)],
+        "dense": rng.normal(size=10),
+        "filled": np.repeat([1.0, 2.0], 5),
+        "count": np.arange(10),
+    })
+
+
+def get_encodings(path: str) -> dict:
+    row_group = pq.ParquetFile(path).metadata.row_group(0)
+    return {row_group.column(i).path_in_schema: row_group.column(i).encodings for i in range(row_group.num_columns)}
+
+
+def test_write_table(table, tmp_path):
+    path = str(tmp_path / "data.parquet")
+
+    parquet_writer.write_table(table, path)
+
+    result = pq.read_table(path)
+    assert result.equals(table.sort_by(BaseDataSource.ERA_COL))
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.row_group(0).sorting_columns == (pq.SortingColumn(0),)
+    assert metadata.num_row_groups == 1
+    assert metadata.row_group(0).column(1).compression == "SNAPPY"
+
+    encodings = get_encodings(path)
+    assert "BYTE_STREAM_SPLIT" in encodings["dense"]
+    assert "BYTE_STREAM_SPLIT" not in encodings["filled"]
+    assert "RLE_DICTIONARY" in encodings["filled"]
+    assert "RLE_DICTIONARY" in encodings[BaseDataSource.ERA_COL]
+
+
+def test_write_table_config(table, tmp_path):
+    path = str(tmp_path / "data.parquet")
+    config = parquet_writer.ParquetWriterConfig(
+        row_group_size=4, compression="zstd", byte_stream_split_threshold=None, sort_column=None
+    )
+
+    parquet_writer.write_table(table, path, config)
+
+    assert pq.read_table(path).equals(table)
+    metadata = pq.ParquetFile(path).metadata
+    assert metadata.num_row_groups == 3
+    assert metadata.row_group(0).sorting_columns == ()
+    assert metadata.row_group(0).column(1).compression == "ZSTD"
+    assert all("BYTE_STREAM_SPLIT" not in encodings for encodings in get_encodings(path).values())
+
+
+def test_write_table_era_range_skips_row_groups(table, tmp_path):
+    path = str(tmp_path / "data.parquet")
+
+    parquet_writer.write_table(table, path, parquet_writer.DEFAULT_CONFIG._replace(row_group_size=5))
+
+    statistics = [
+        pq.ParquetFile(path).metadata.row_group(i).column(0).statistics for i in range(2)
+    ]
+    assert [(stats.min, stats.max) for stats in statistics] == [("0001", "0005"), ("0006", "0010")]
+
+
+def test_write_table_missing_values(tmp_path):
+    path = str(tmp_path / "data.parquet")
+    table = pa.table({BaseDataSource.ERA_COL: ["X"], "column1": pa.array([None], pa.float64())})
+
+    parquet_writer.write_table(table, path)
+
+    assert pq.read_table(path).equals(table)
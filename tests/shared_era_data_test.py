@@ -0,0 +1,109 @@
+import multiprocessing
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from numerai_era_data import shared_era_data
+from numerai_era_data.data_sources.base_data_source import BaseDataSource
+from numerai_era_data.era_data_api import EraDataAPI
+
+
+@pytest.fixture
+def data():
+    return pd.DataFrame(
+        {BaseDataSource.ERA_COL: ["0001", "0002", "0003"], "column1": [1.0, np.nan, 3.0], "column2": [4, 5, 6]}
+    )
+
+
+def sum_columns(descriptor):
+    return shared_era_data.attach(descriptor).drop(columns=[BaseDataSource.ERA_COL]).sum().tolist()
+
+
+def test_attach_shared_memory(data):
+    with shared_era_data.SharedEraData(data) as publication:
+        result = shared_era_data.attach(publication.descriptor)
+
+        assert result[BaseDataSource.ERA_COL].tolist() == ["0001", "0002", "0003"]
+        pd.testing.assert_frame_equal(result, data.astype({"column2": "float64"}))
+        _, values = shared_era_data._attached[shared_era_data._get_key(publication.descriptor)]
+        assert np.shares_memory(result["column1"].to_numpy(), values)
+        with pytest.raises(ValueError):
+            result["column1"].to_numpy()[0] = 0.0
+
+        del result
+        shared_era_data.detach(publication.descriptor)
+
+
+def test_attach_memmap(data, tmp_path):
+    path = str(tmp_path / "eras.npy")
+
+    with shared_era_data.SharedEraData(data, path) as publication:
+        result = shared_era_data.attach(publication.descriptor)
+
+        assert publication.descriptor.name == path
+        pd.testing.assert_frame_equal(result, data.astype({"column2": "float64"}))
+
+        del result
+        shared_era_data.detach(publication.descriptor)
+
+
+def test_attach_memmap_republished(data, tmp_path):
+    path = str(tmp_path / "eras.npy")
+
+    with shared_era_data.SharedEraData(data, path) as publication:
+        shared_era_data.attach(publication.descriptor)
+
+    # same path and shape with new values, then a different shape
+    with shared_era_data.SharedEraData(data.assign(column1=[7.0, 8.0, 9.0]), path) as publication:
+        assert shared_era_data.attach(publication.descriptor)["column1"].tolist() == [7.0, 8.0, 9.0]
+
+    with shared_era_data.SharedEraData(data.drop(columns=["column2"]), path) as publication:
+        result = shared_era_data.attach(publication.descriptor)
+
+        pd.testing.assert_frame_equal(result, data.drop(columns=["column2"]))
+
+        del result
+        shared_era_data.detach(publication.descriptor)
+
+
+def test_attach_in_workers(data):
+    context = multiprocessing.get_context("fork")
+
+    with shared_era_data.SharedEraData(data) as publication, context.Pool(2) as pool:
+        results = pool.map(sum_columns, [publication.descriptor] * 4)
+
+    assert results == [[4.0, 15.0]] * 4
+
+
+def test_close_unlinks(data):
+    publication = shared_era_data.SharedEraData(data)
+    descriptor = publication.descriptor
+    publication.close()
+
+    with pytest.raises(FileNotFoundError):
+        shared_era_data.attach(descriptor)
+
+
+def test_empty(data):
+    with shared_era_data.SharedEraData(data.iloc[:0]) as publication:
+        result = shared_era_data.attach(publication.descriptor)
+
+        assert result.empty
+        assert result.columns.tolist() == data.columns.tolist()
+
+        del result
+        shared_era_data.detach(publication.descriptor)
+
+
+def test_publish_all_eras(data):
+    instance = EraDataAPI(server_url="")
+    instance.data_cache = data
+
+    with instance.publish_all_eras(update_if_stale=False) as publication:
+        result = shared_era_data.attach(publication.descriptor)
+
+        assert result["column2"].tolist() == [4.0, 5.0, 6.0]
+
+        del result
+        shared_era_data.detach(publication.descriptor)
@@ -0,0 +1,123 @@
+import os
+
+import pandas as pd
+from mock import MagicMock, patch
+
+from numerai_era_data.transform_graph import TransformGraph
+
+
+def add_one(data, column):
+    return pd.DataFrame({column: data.iloc[:, 0] + 1})
+
+
+calls = []
+
+
+def counted_add_one(data, column):
+    calls.append(column)
+    return add_one(data, column)
+
+
+def ratio(numerator, denominator):
+    return pd.DataFrame({"ratio": numerator.iloc[:, 0] / denominator.iloc[:, 0]})
+
+
+def test_get_transform():
+    graph = TransformGraph()
+    graph.add_source("raw", pd.DataFrame({"value": [1.0, 2.0]}))
+    graph.add_transform("derived", add_one, ["raw"], {"column": "derived"})
+
+    assert graph.get("derived")["derived"].tolist() == [2.0, 3.0]
+
+
+def test_get_transform_memoized_until_input_changes():
+    graph = TransformGraph()
+    func = MagicMock(side_effect=add_one)
+    graph.add_source("raw", pd.DataFrame({"value": [1.0, 2.0]}))
+    graph.add_transform("derived", func, ["raw"], {"column": "derived"})
+
+    graph.get("derived")
+    graph.add_source("raw", pd.DataFrame({"value": [1.0, 2.0]}))
+    graph.get("derived")
+    assert func.call_count == 1
+
+    graph.add_source("raw", pd.DataFrame({"value": [1.0, 3.0]}))
+    assert graph.get("derived")["derived"].tolist() == [2.0, 4.0]
+    assert func.call_count == 2
+
+
+def test_get_transform_params_invalidate():
+    graph = TransformGraph()
+    graph.add_source("raw", pd.DataFrame({"value": [1.0]}))
+    graph.add_transform("derived", add_one, ["raw"], {"column": "a"})
+    hash_a = graph.get_hash("derived")
+    graph.add_transform("derived", add_one, ["raw"], {"column": "b"})
+
+    assert graph.get_hash("derived") != hash_a
+    assert graph.get("derived").columns.tolist() == ["b"]
+
+
+def test_get_transform_disk_cache(tmp_path):
+    calls.clear()
+    graph = TransformGraph(str(tmp_path))
+    graph.add_source("raw", pd.DataFrame({"value": [1.0, 2.0]}))
+    graph.add_transform("derived", counted_add_one, ["raw"], {"column": "derived"})
+    graph.get("derived")
+
+    # a new graph with the same inputs reads the result from disk instead of recomputing
+    other_graph = TransformGraph(str(tmp_path))
+    other_graph.add_source("raw", pd.DataFrame({"value": [1.0, 2.0]}))
+    other_graph.add_transform("derived", counted_add_one, ["raw"], {"column": "derived"})
+
+    assert other_graph.get("derived")["derived"].tolist() == [2.0, 3.0]
+    assert calls == ["derived"]
+
+    # only the latest result of a node is kept on disk
+    other_graph.add_source("raw", pd.DataFrame({"value": [5.0]}))
+    other_graph.get("derived")
+    assert len([f for f in os.listdir(tmp_path) if f.startswith("derived-")]) == 1
+
+    other_graph.clear_cache()
+    assert os.listdir(tmp_path) == []
+
+
+def test_get_transform_multiple_inputs():
+    graph = TransformGraph()
+    graph.add_source("returns", pd.DataFrame({"value": [0.1, 0.2]}))
+    graph.add_source("inflation", pd.DataFrame({"value": [0.05, 0.1]}))
+    graph.add_transform("real_returns", ratio, ["returns", "inflation"])
+
+    assert graph.get("real_returns")["ratio"].tolist() == [2.0, 2.0]
+
+
+def test_get_transform_dependencies_invalidate():
+    graph = TransformGraph()
+    graph.add_source("raw", pd.DataFrame({"value": [1.0]}))
+    graph.add_transform("derived", add_one, ["raw"], {"column": "derived"})
+    hash_without = graph.get_hash("derived")
+    graph.add_transform("derived", add_one, ["raw"], {"column": "derived"}, [ratio])
+    hash_ratio = graph.get_hash("derived")
+    graph.add_transform("derived", add_one, ["raw"], {"column": "derived"}, [counted_add_one])
+
+    assert len({hash_without, hash_ratio, graph.get_hash("derived")}) == 3
+
+
+def test_get_transform_disk_cache_replaced_atomically(tmp_path):
+    calls.clear()
+    graph = TransformGraph(str(tmp_path))
+    graph.add_source("raw", pd.DataFrame({"value": [1.0, 2.0]}))
+    graph.add_transform("derived", counted_add_one, ["raw"], {"column": "derived"})
+    graph.get("derived")
+    graph.add_source("raw", pd.DataFrame({"value": [3.0]}))
+    graph.get("derived")
+
+    assert os.listdir(tmp_path) == [f"derived-{graph.get_hash('derived')}.parquet"]
+
+    # a result removed by another process while it is read is recomputed
+    other_graph = TransformGraph(str(tmp_path))
+    other_graph.add_source("raw", pd.DataFrame({"value": [3.0]}))
+    other_graph.add_transform("derived", counted_add_one, ["raw"], {"column": "derived"})
+    with patch("pandas.read_parquet", side_effect=FileNotFoundError):
+        assert other_graph.get("derived")["derived"].tolist() == [4.0]
+
+    assert calls == ["derived", "derived", "derived"]
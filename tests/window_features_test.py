@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from numerai_era_data import window_features
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(0)
+    values = np.cumsum(rng.normal(size=(120, 3)), axis=0) + [0, 100, 1e5]
+    values[50, 0] = np.nan
+    return values
+
+
+def test_rolling_zscore(values):
+    frame = pd.DataFrame(values)
+    rolling = frame.rolling(12)
+    expected = ((frame - rolling.mean()) / rolling.std()).to_numpy()
+
+    np.testing.assert_allclose(window_features.rolling_zscore(values, 12), expected, rtol=1e-8, atol=1e-8)
+
+
+def test_rolling_zscore_constant_window():
+    values = np.array([[1.0], [1.0], [1.0], [2.0]])
+
+    result = window_features.rolling_zscore(values, 3)
+
+    assert np.isnan(result[:3]).all()
+    assert result[3, 0] == pytest.approx((2 - 4 / 3) / np.std([1, 1, 2], ddof=1))
+
+
+def test_rolling_rank(values):
+    result = window_features.rolling_rank(values, 10)
+
+    for row, column in [(9, 0), (30, 1), (119, 2)]:
+        window = values[row - 9:row + 1, column]
+        assert result[row, column] == (window <= window[-1]).mean()
+    assert np.isnan(result[:9]).all()
+    assert np.isnan(result[50:60, 0]).all()
+    assert not np.isnan(result[60, 0])
+
+
+def test_rolling_slope_and_acceleration(values):
+    slope = window_features.rolling_slope(values, 12)
+    acceleration = window_features.rolling_acceleration(values, 12)
+
+    for row, column in [(11, 0), (40, 1), (119, 2)]:
+        window = values[row - 11:row + 1, column]
+        assert slope[row, column] == pytest.approx(np.polyfit(np.arange(12), window, 1)[0])
+        assert acceleration[row, column] == pytest.approx(2 * np.polyfit(np.arange(12), window, 2)[0])
+    assert np.isnan(slope[:11]).all()
+    assert np.isnan(slope[50:62, 0]).all()
+
+
+def test_short_series():
+    values = np.ones((3, 2))
+
+    for feature in window_features.FEATURES.values():
+        assert np.isnan(feature(values, 12)).all()